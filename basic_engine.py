@@ -2,29 +2,123 @@
 Work in-progress.
 '''
 
-from keras.models import load_model
 import chess
-import train
+import chess.polyglot
+import collections
+import eval_cache
 import extract_features
+import incremental_features
+import move_ordering
+import multiprocessing
+import numpy_model
+import time
+import transposition_table
 import numpy as np
 
-model = load_model(
-    '/Users/colinni/evAl-chess/saved_keras_model.h5'
-)
+# The memory to give the transposition table, in MB.
+TT_SIZE_MB = 64
+# The number of evaluations to cache.
+EVAL_CACHE_SIZE = 2 ** 20
+# The seconds the engine takes to choose each move.
+MOVE_TIME = 10
+# The most capture and promotion nodes to search past each leaf of a
+# search; see `quiescence()`.
+QUIESCENCE_NODE_LIMIT = 64
+# The value of each piece in pawns, and the most that a capture is
+# assumed to gain beyond the value of the piece captured, for delta
+# pruning.
+PAWN_VALS = {
+    chess.PAWN : 1, chess.KNIGHT : 3, chess.BISHOP : 3, chess.ROOK : 5,
+    chess.QUEEN : 9, chess.KING : 0
+}
+DELTA_MARGIN = 2
+
+# The trained model, with its scaling folded in, run with numpy rather
+# than Keras. (See `numpy_model.py`.)
+model = numpy_model.load_model(numpy_model.NUMPY_MODEL_PATH)
 
-def engine_evaluate(position):
+# Shared by every search, so that a position is never evaluated twice.
+evaluation_cache = eval_cache.EvalCache(EVAL_CACHE_SIZE)
+
+def engine_evaluate(position, features=None, cache=None, evaluator=None):
     '''
     The zero-search engine's evaluation of `position`; a higher number
     means that the engine evaluates that the position favors white.
+
+    `features`, if given, are the already-extracted features of
+    `position` -- e.g., those kept by an
+    `incremental_features.FeatureAccumulator`. `cache`, if given, is an
+    `eval_cache.EvalCache` to look the evaluation up in first.
+    `evaluator`, if given, evaluates rows of features in place of
+    `engine_evaluate_batch()` -- e.g., `eval_server.EvalServer`'s
+    `evaluate_batch`.
+    '''
+    if evaluator is None:
+        evaluator = engine_evaluate_batch
+    if cache is not None:
+        key = chess.polyglot.zobrist_hash(position)
+        evaluation = cache.get(key)
+        if evaluation is not None:
+            return evaluation
+    if features is None:
+        features = extract_features.get_features(position)
+    evaluation = evaluator([features])[0]
+    if cache is not None:
+        cache.put(key, evaluation)
+    return evaluation
+
+
+def engine_evaluate_batch(features_batch):
+    '''
+    The zero-search engine's evaluations of many positions, given their
+    features, in a single call to the model. Calling the model once per
+    position is dominated by the overhead of the call itself.
+
+    Returns:
+        numpy array of floats
+            The evaluation of each row of `features_batch`.
+    '''
+    x_unscaled = np.array(features_batch).astype(float)
+    if len(x_unscaled) == 0:
+        return np.empty(0)
+    return model.evaluate(x_unscaled)
+
+
+def _evaluate_children(accumulator, moves, cache=None, evaluator=None):
+    '''
+    The evaluations of the position after each of `moves`, found by
+    pushing and popping each on `accumulator`. Those not in `cache` are
+    evaluated in one batch -- by `evaluator`, if given, else by
+    `engine_evaluate_batch()` -- and added to it.
+
+    Returns:
+        2-d tuple
+            The list of evaluations and the number of them that were
+            evaluated rather than looked up.
     '''
-    x_unscaled = np.array([extract_features.get_features(position)]).astype(float)
-    x_scaled = train.scaler_X.transform(x_unscaled)
-    y_scaled = scaled_evaluation = model.predict(extract_features.split_features(x_scaled))
-    y_unscaled = unscaled_evaluation = train.scaler_Y.inverse_transform(y_scaled)
-    return unscaled_evaluation[0][0]
+    if evaluator is None:
+        evaluator = engine_evaluate_batch
+    evaluations, keys, missing, missing_features = [], [], [], []
+    for i, move in enumerate(moves):
+        accumulator.push(move)
+        evaluation = None
+        if cache is not None:
+            keys.append(chess.polyglot.zobrist_hash(accumulator.board))
+            evaluation = cache.get(keys[-1])
+        if evaluation is None:
+            missing.append(i)
+            missing_features.append(list(accumulator.features))
+        evaluations.append(evaluation)
+        accumulator.pop()
 
+    for i, evaluation in zip(missing, evaluator(missing_features)):
+        evaluations[i] = evaluation
+        if cache is not None:
+            cache.put(keys[i], evaluation)
+    return evaluations, len(missing)
 
-def get_engine_analysis(position):
+
+def get_engine_analysis(position, cache=evaluation_cache):
     '''
     The result of the zero-search engine's mini-max search for each possible
     move. Of course for an engine that doesn't search, it's basically just
@@ -35,13 +129,12 @@ def get_engine_analysis(position):
     from. Heh, oops -- I thought I forgot to add something to the training
     data...)
     '''
-    engine_analysis = {}
-    for move in position.legal_moves:
-        # Play the move; evaluate the position; then 'unplay' the move.
-        position.push(move)
-        eval_position = engine_evaluate(position)
-        engine_analysis[move] = eval_position
-        position.pop()
+    # Play each move, noting the features of the position, and
+    # evaluate them all at once.
+    moves = list(position.legal_moves)
+    accumulator = incremental_features.FeatureAccumulator(position)
+    evaluations, _ = _evaluate_children(accumulator, moves, cache)
+    engine_analysis = dict(zip(moves, evaluations))
 
     return engine_analysis
 
@@ -59,59 +152,556 @@ def get_engine_move(position, playing_color):
         )
     )
 
-def alpha_beta(position, depth, alpha=-500, beta=+500, color=chess.WHITE):
+def alpha_beta(
+    position, depth, alpha=-500, beta=+500, color=chess.WHITE,
+    accumulator=None, table=None, stats=None, cache=evaluation_cache,
+    budget=None, orderer=None, q_node_limit=QUIESCENCE_NODE_LIMIT,
+    evaluator=None
+):
+    '''
+    The mini-max evaluation of `position` searched to `depth` and the
+    best move, pruned by alpha-beta.
+
+    Parameters:
+        `table` : `transposition_table.TranspositionTable` or None
+            If given, the results of searching each position are kept
+            in it, so that positions reached again -- by another order
+            of moves, or in a later search -- are cut off or searched
+            best move first.
+        `stats` : `collections.Counter` or None
+            If given, counts the `'nodes'` searched, the `'evaluations'`
+            made, the `'tt_cutoffs'`, and the `'cutoffs'` and
+            `'first_move_cutoffs'` (see
+            `move_ordering.first_move_cutoff_rate()`).
+        `cache` : `eval_cache.EvalCache` or None
+            Where to look up evaluations before making them; by default,
+            the evaluations of every search.
+        `budget` : `SearchBudget` or None
+            If given, the search raises `OutOfBudget` as soon as the
+            budget runs out.
+        `orderer` : `move_ordering.MoveOrderer` or None
+            The killer moves and history table to order the moves by;
+            by default, new ones for this search.
+        `q_node_limit` : int
+            The most nodes to search past each leaf in `quiescence()`;
+            `0` evaluates the leaves as they are.
+        `evaluator` : callable or None
+            Evaluates rows of features, as `engine_evaluate_batch()`
+            does by default -- e.g., the `evaluate_batch` of an
+            `eval_server.EvalServer` shared with other searches.
+    '''
+    # Carry the features down the tree, updating them move by move,
+    # rather than extracting them from scratch at every leaf. The
+    # search makes and unmakes its moves on the accumulator's board
+    # rather than copying `position` for each child.
+    if accumulator is None:
+        accumulator = incremental_features.FeatureAccumulator(position)
+    position = accumulator.board
+    if stats is None:
+        stats = collections.Counter()
+    if orderer is None:
+        orderer = move_ordering.MoveOrderer()
+    stats['nodes'] += 1
+    if budget is not None and budget.is_exhausted(stats):
+        raise OutOfBudget
+
     if depth == 0:
-        _eval = engine_evaluate(position)
+        _eval = quiescence(
+            accumulator, alpha, beta, color, stats, cache, budget,
+            q_node_stop=stats['q_nodes'] + q_node_limit,
+            evaluator=evaluator
+        )
         # print(position, _eval)
         return _eval, None
 
-    branches = []
-    for move in position.legal_moves:
-        child_position = position.copy()
-        child_position.push(move)
-        branches.append((move, child_position))
-
-    branches_sorted = tuple(
-        sorted(
-            branches,
-            key=(
-                lambda item :
-                    - 2 * item[1].is_check()
-                    - 1 * (position.piece_type_at(item[0].to_square) is not None)
-            )
+    alpha_original, beta_original = alpha, beta
+    table_move = None
+    if table is not None:
+        key = chess.polyglot.zobrist_hash(position)
+        entry = table.probe(key)
+        if entry is not None:
+            entry_depth, bound, score, table_move = entry
+            if entry_depth >= depth:
+                if bound == transposition_table.EXACT:
+                    stats['tt_cutoffs'] += 1
+                    return score, table_move
+                elif bound == transposition_table.LOWER_BOUND:
+                    alpha = max(alpha, score)
+                elif bound == transposition_table.UPPER_BOUND:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    stats['tt_cutoffs'] += 1
+                    return score, table_move
+
+    # Order the moves without making them.
+    moves_sorted = orderer.order(position, position.legal_moves, table_move)
+
+    # If the children are leaves, evaluate them all in one batch rather
+    # than one call to the model each. (Cutoffs then no longer save
+    # evaluations at this depth, but a batch costs about as much as a
+    # single evaluation.)
+    if depth == 1:
+        evaluations, n_evaluated = _evaluate_children(
+            accumulator, moves_sorted, cache, evaluator
         )
-    )
+        stats['nodes'] += len(moves_sorted)
+        stats['evaluations'] += n_evaluated
+        leaf_evals = dict(zip(moves_sorted, evaluations))
+
+    def child_alpha_beta(move, alpha, beta, child_color):
+        if depth == 1 and q_node_limit == 0:
+            return leaf_evals[move], None
+        accumulator.push(move)
+        if depth == 1:
+            child_result = quiescence(
+                accumulator, alpha, beta, child_color, stats, cache,
+                budget, stand_pat=leaf_evals[move],
+                q_node_stop=stats['q_nodes'] + q_node_limit,
+                evaluator=evaluator
+            ), None
+        else:
+            child_result = alpha_beta(
+                accumulator.board, depth - 1, alpha, beta, child_color,
+                accumulator, table, stats, cache, budget, orderer,
+                q_node_limit, evaluator
+            )
+        accumulator.pop()
+        return child_result
 
     if color == chess.WHITE:
         best_eval, best_move = -500, None
-        for move, child_position in branches_sorted:
-            child_eval, _ = alpha_beta(child_position, depth - 1, alpha, beta, chess.BLACK)
+        for i, move in enumerate(moves_sorted):
+            child_eval, _ = child_alpha_beta(move, alpha, beta, chess.BLACK)
             if child_eval > best_eval:
                 best_eval = child_eval
                 best_move = move
             alpha = max(alpha, child_eval)
             if beta <= alpha:
                 break
-        return best_eval, best_move
     elif color == chess.BLACK:
         best_eval, best_move = +500, None
-        for move, child_position in branches_sorted:
-            child_eval, _ = alpha_beta(child_position, depth - 1, alpha, beta, chess.WHITE)
+        for i, move in enumerate(moves_sorted):
+            child_eval, _ = child_alpha_beta(move, alpha, beta, chess.WHITE)
             if child_eval < best_eval:
                 best_eval = child_eval
                 best_move = move
             beta = min(beta, child_eval)
             if beta <= alpha:
                 break
-        return best_eval, best_move
+
+    if moves_sorted and beta <= alpha:
+        orderer.record_cutoff(position, move, depth)
+        stats['cutoffs'] += 1
+        stats['first_move_cutoffs'] += (i == 0)
+
+    if table is not None:
+        # Scores outside the window are only bounds on the true score.
+        if best_eval <= alpha_original:
+            bound = transposition_table.UPPER_BOUND
+        elif best_eval >= beta_original:
+            bound = transposition_table.LOWER_BOUND
+        else:
+            bound = transposition_table.EXACT
+        table.store(key, depth, bound, best_eval, best_move)
+    return best_eval, best_move
+
+
+def _pawns(evaluation):
+    '''
+    `evaluation` in pawns. The model's evaluations are the signed square
+    roots of pawns; see `training_data.transform_Y()`.
+    '''
+    return evaluation * abs(evaluation)
+
+
+def quiescence(
+    accumulator, alpha, beta, color, stats, cache=evaluation_cache,
+    budget=None, stand_pat=None, q_node_stop=None, evaluator=None
+):
+    '''
+    The evaluation of the accumulator's position once the captures and
+    promotions in it have played out, so that a search never stops --
+    and evaluates a position -- halfway through an exchange.
+
+    Only captures and promotions are searched, most valuable victim
+    first. The side to move may always 'stand pat' -- decline to
+    capture -- and take the evaluation of the position as it is, which
+    cuts off the search if it's already outside the window. Captures
+    that couldn't bring the evaluation back into the window even if
+    they won `DELTA_MARGIN` pawns more than the piece captured aren't
+    searched (delta pruning).
+
+    Parameters:
+        `stand_pat` : float or None
+            The evaluation of the position, if already made.
+        `q_node_stop` : int or None
+            Searches no more captures once `stats['q_nodes']` reaches
+            it. A search cut short is only a rough evaluation, and
+            which captures it got to depends on the window `alpha`,
+            `beta`.
+        `evaluator` : callable or None
+            See `alpha_beta()`.
+    '''
+    position = accumulator.board
+    if budget is not None and budget.is_exhausted(stats):
+        raise OutOfBudget
+
+    if stand_pat is None:
+        n_misses = cache.misses if cache is not None else 0
+        stand_pat = engine_evaluate(
+            position, accumulator.features, cache, evaluator
+        )
+        stats['evaluations'] += (
+            cache.misses - n_misses if cache is not None else 1
+        )
+    if color == chess.WHITE:
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+    else:
+        if stand_pat <= alpha:
+            return stand_pat
+        beta = min(beta, stand_pat)
+
+    captures = sorted(
+        (
+            move for move in position.legal_moves
+            if position.is_capture(move) or move.promotion
+        ),
+        key=lambda move : move_ordering.mvv_lva(position, move),
+        reverse=True
+    )
+    best_eval = stand_pat
+    for move in captures:
+        if q_node_stop is not None and stats['q_nodes'] >= q_node_stop:
+            break
+        victim = (
+            chess.PAWN if position.is_en_passant(move)
+            else position.piece_type_at(move.to_square)
+        )
+        gain = (
+            (PAWN_VALS[victim] if victim is not None else 0)
+            + (PAWN_VALS[move.promotion] - 1 if move.promotion else 0)
+            + DELTA_MARGIN
+        )
+        if (
+            _pawns(stand_pat) + gain <= _pawns(alpha)
+            if color == chess.WHITE
+            else _pawns(stand_pat) - gain >= _pawns(beta)
+        ):
+            continue
+
+        stats['nodes'] += 1
+        stats['q_nodes'] += 1
+        accumulator.push(move)
+        child_eval = quiescence(
+            accumulator, alpha, beta, not color, stats, cache, budget,
+            q_node_stop=q_node_stop, evaluator=evaluator
+        )
+        accumulator.pop()
+        if color == chess.WHITE:
+            best_eval = max(best_eval, child_eval)
+            alpha = max(alpha, child_eval)
+        else:
+            best_eval = min(best_eval, child_eval)
+            beta = min(beta, child_eval)
+        if beta <= alpha:
+            break
+    return best_eval
+
+
+class OutOfBudget(Exception):
+    '''
+    Raised by `alpha_beta()` when its `SearchBudget` runs out.
+    '''
+
+
+class SearchBudget:
+    '''
+    A limit on the wall-clock time and on the number of nodes a search
+    may take, starting from when the budget is made.
+
+    Parameters:
+        `time_limit` : float or None
+            The seconds the search may take.
+        `node_limit` : int or None
+            The number of nodes -- the `'nodes'` of the search's stats
+            -- the search may search.
+    '''
+
+    def __init__(self, time_limit=None, node_limit=None):
+        self.deadline = (
+            time.monotonic() + time_limit if time_limit is not None else None
+        )
+        self.node_limit = node_limit
+
+    def is_exhausted(self, stats):
+        return (
+            (self.node_limit is not None and stats['nodes'] > self.node_limit)
+            or (self.deadline is not None and time.monotonic() > self.deadline)
+        )
+
+
+def iterative_deepening(
+    position, time_limit=None, node_limit=None, max_depth=32, table=None,
+    stats=None, cache=evaluation_cache, orderer=None, evaluator=None
+):
+    '''
+    Searches `position` to depth 1, 2, 3 ... until the time or nodes
+    run out or `max_depth` is searched, and returns the result of the
+    deepest search that finished. Each search orders the moves by the
+    best moves the last found, which are kept in `table`, and by the
+    killer moves and history of `orderer`, so it costs little more than
+    searching to the final depth directly.
+
+    Depth 1 is always searched in full, whatever the budget. For
+    `evaluator`, see `alpha_beta()`.
+
+    Returns:
+        3-d tuple
+            The evaluation, the best move and the depth searched to.
+    '''
+    if table is None:
+        table = transposition_table.TranspositionTable(TT_SIZE_MB)
+    if stats is None:
+        stats = collections.Counter()
+    if orderer is None:
+        orderer = move_ordering.MoveOrderer()
+    budget = SearchBudget(time_limit, node_limit)
+    best_eval, best_move, depth_searched = None, None, 0
+    for depth in range(1, max_depth + 1):
+        # An interrupted search leaves the accumulator mid-move; start
+        # each from a new one.
+        accumulator = incremental_features.FeatureAccumulator(position)
+        try:
+            best_eval, best_move = alpha_beta(
+                position, depth, color=position.turn,
+                accumulator=accumulator, table=table, stats=stats,
+                cache=cache, budget=budget if depth > 1 else None,
+                orderer=orderer, evaluator=evaluator
+            )
+        except OutOfBudget:
+            break
+        depth_searched = depth
+        # No move means the game is over; there's nothing to deepen.
+        if best_move is None or budget.is_exhausted(stats):
+            break
+    return best_eval, best_move, depth_searched
+
+
+def transposition_table_stats(position, depth, size_mb=TT_SIZE_MB):
+    '''
+    Searches `position` to `depth` with and without a transposition
+    table, to measure what the table saves.
+
+    Returns:
+        dict
+            The `'nodes'` and `'evaluations'` of each search, the
+            table's `'hit_rate'` and the fraction of nodes saved,
+            `'node_reduction'`.
+    '''
+    # Share the accumulator so that both searches evaluate the same
+    # features. (The piece slots are randomly permuted per
+    # accumulator.)
+    accumulator = incremental_features.FeatureAccumulator(position)
+    stats_without, stats_with = collections.Counter(), collections.Counter()
+    # Don't cache the evaluations, either; the second search would
+    # make none.
+    alpha_beta(
+        position, depth, color=position.turn, accumulator=accumulator,
+        stats=stats_without, cache=None
+    )
+    table = transposition_table.TranspositionTable(size_mb)
+    alpha_beta(
+        position, depth, color=position.turn, accumulator=accumulator,
+        table=table, stats=stats_with, cache=None
+    )
+    return {
+        'nodes' : (stats_without['nodes'], stats_with['nodes']),
+        'evaluations' : (
+            stats_without['evaluations'], stats_with['evaluations']
+        ),
+        'tt_cutoffs' : stats_with['tt_cutoffs'],
+        'hit_rate' : table.hit_rate,
+        'node_reduction' : 1 - stats_with['nodes'] / stats_without['nodes']
+    }
+
+
+# A fixed suite of positions to time searches on: the start, an open
+# game, a middlegame and an endgame.
+BENCHMARK_FENS = (
+    chess.STARTING_FEN,
+    'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4',
+    'r2q1rk1/ppp2ppp/2np1n2/2b1p1B1/2B1P1b1/2NP1N2/PPP2PPP/R2Q1RK1 w - - 0 8',
+    '8/5pk1/6p1/3R4/7P/6P1/r4PK1/8 w - - 0 40'
+)
+
+# The transposition table and evaluator of each worker of a search
+# pool; see `make_search_pool()`.
+_worker_table = _worker_evaluator = None
+
+def _init_search_worker(tt_size_mb, clients, n_started):
+    global _worker_table, _worker_evaluator
+    _worker_table = transposition_table.TranspositionTable(tt_size_mb)
+    # A forked worker starts with a copy of its parent's evaluations.
+    evaluation_cache.clear()
+    if clients is not None:
+        # Take the next client no other worker has.
+        with n_started.get_lock():
+            _worker_evaluator = clients[n_started.value].evaluate_batch
+            n_started.value += 1
+
+
+def make_search_pool(n_processes=None, tt_size_mb=TT_SIZE_MB, server=None):
+    '''
+    A pool of processes for `parallel_root_search()`. Each has its own
+    evaluation cache and transposition table of `tt_size_mb`, kept from
+    one search to the next, and evaluates with its own model or, if
+    given, with `server`, an `eval_server.EvalServer` in this process
+    that batches the evaluations of all the workers together.
+    '''
+    if n_processes is None:
+        n_processes = multiprocessing.cpu_count()
+    clients = (
+        server.process_clients(n_processes) if server is not None else None
+    )
+    return multiprocessing.Pool(
+        n_processes, _init_search_worker,
+        (tt_size_mb, clients, multiprocessing.Value('i', 0))
+    )
+
+
+def _search_root_move(args):
+    '''
+    Searches the position after a root move in a worker of a search
+    pool, from a copy of the root's accumulator.
+    '''
+    accumulator, move, depth, alpha, beta, q_node_limit = args
+    stats = collections.Counter()
+    child_color = not accumulator.board.turn
+    accumulator.push(move)
+    child_eval, _ = alpha_beta(
+        accumulator.board, depth - 1, alpha, beta, child_color,
+        accumulator, table=_worker_table, stats=stats,
+        q_node_limit=q_node_limit, evaluator=_worker_evaluator
+    )
+    return move, child_eval, stats
+
+
+def parallel_root_search(
+    position, depth, pool, stats=None, q_node_limit=QUIESCENCE_NODE_LIMIT,
+    accumulator=None
+):
+    '''
+    The same search as `alpha_beta()`, with the moves of the root
+    searched in parallel by the processes of `pool` (see
+    `make_search_pool()`).
+
+    The first move, the best by `move_ordering`, is searched with the
+    full window to find a bound; the rest are then searched at once
+    with the window narrowed to beat it. Those that don't come back
+    with only a bound, which can't be the best.
+
+    Given the same `accumulator` -- and so the same piece slots -- the
+    result is that of `alpha_beta()` with `q_node_limit=0`. With a
+    quiescence node limit it may differ slightly: a leaf whose
+    quiescence search the limit cuts short is evaluated differently
+    under different windows (see `quiescence()`), and the moves are
+    searched here with other windows than by `alpha_beta()`.
+
+    Returns:
+        2-d tuple
+            The evaluation and the best move.
+    '''
+    if stats is None:
+        stats = collections.Counter()
+    if accumulator is None:
+        accumulator = incremental_features.FeatureAccumulator(position)
+    position = accumulator.board
+    color = position.turn
+    moves = move_ordering.MoveOrderer().order(position, position.legal_moves)
+    if not moves:
+        return alpha_beta(
+            position, depth, color=color, accumulator=accumulator,
+            stats=stats
+        )
+
+    # Each worker is sent a copy of `accumulator`.
+    best_move, best_eval, first_stats = pool.apply(
+        _search_root_move,
+        ((accumulator, moves[0], depth, -500, +500, q_node_limit), )
+    )
+    stats.update(first_stats)
+    alpha, beta = (
+        (best_eval, +500) if color == chess.WHITE else (-500, best_eval)
+    )
+    # Take the results in the order of the moves, not as they finish,
+    # so that of equally good moves the first is chosen, as by
+    # `alpha_beta()`.
+    for move, child_eval, child_stats in pool.imap(
+        _search_root_move,
+        [
+            (accumulator, move, depth, alpha, beta, q_node_limit)
+            for move in moves[1 : ]
+        ]
+    ):
+        stats.update(child_stats)
+        if (
+            child_eval > best_eval if color == chess.WHITE
+            else child_eval < best_eval
+        ):
+            best_eval, best_move = child_eval, move
+    return best_eval, best_move
+
+
+def parallel_speedup(depth, process_counts, fens=BENCHMARK_FENS):
+    '''
+    Times `parallel_root_search()` on the positions of `fens` with each
+    number of processes of `process_counts`, against `alpha_beta()`.
+
+    Returns:
+        dict
+            The seconds of the serial search, `'serial'`, and of the
+            parallel search with each number of processes, with the
+            speedup of each.
+    '''
+    start = time.perf_counter()
+    for fen in fens:
+        position = chess.Board(fen)
+        alpha_beta(
+            position, depth, color=position.turn,
+            table=transposition_table.TranspositionTable(TT_SIZE_MB),
+            cache=eval_cache.EvalCache(EVAL_CACHE_SIZE)
+        )
+    serial_time = time.perf_counter() - start
+
+    report = {'serial' : serial_time}
+    for n_processes in process_counts:
+        # Start the pool before timing; the workers load the model.
+        with make_search_pool(n_processes) as pool:
+            pool.map(abs, range(n_processes))
+            start = time.perf_counter()
+            for fen in fens:
+                parallel_root_search(chess.Board(fen), depth, pool)
+            parallel_time = time.perf_counter() - start
+        report[n_processes] = {
+            'seconds' : parallel_time,
+            'speedup' : serial_time / parallel_time
+        }
+    return report
 
 
 def play_engine(verbose=False):
 
     position = chess.Board()
+    # Kept between moves; much of each search was searched by the last.
+    table = transposition_table.TranspositionTable(TT_SIZE_MB)
     while not position.is_game_over():
         # engine_move, _eval = get_engine_move(position, chess.WHITE)
-        engine_eval, engine_move = alpha_beta(position, 4)
+        table.new_search()
+        engine_eval, engine_move, _ = iterative_deepening(
+            position, time_limit=MOVE_TIME, table=table
+        )
 
         # if verbose:
         #     for move, _eval in get_engine_analysis(position).items():
@@ -124,7 +714,8 @@ def play_engine(verbose=False):
         player_move = input('Your move: ')
         position.push_san(player_move)
 
-play_engine(True)
+if __name__ == '__main__':
+    play_engine(True)
 
 # position = chess.Board()
 #
@@ -7,27 +7,352 @@ the static evaluation for a position. This is something that isn't
 available through the UCI protocol. (Trust me; I tried.)
 '''
 
+import asyncio
+import atexit
+import collections
+import os
 import subprocess
 import chess
 
-p = subprocess.Popen(
-    ['/Users/colinni/evAl-chess/Stockfish_modified/src/stockfish'],
-    stdin=subprocess.PIPE,
-    stdout=subprocess.PIPE
-)
-p.stdout.readline() # Prints the authors when first started.
+STOCKFISH_PATH = '/Users/colinni/evAl-chess/Stockfish_modified/src/stockfish'
+# Names the environment variable that, if set, overrides
+# `STOCKFISH_PATH`.
+STOCKFISH_PATH_ENV = 'STOCKFISH_PATH'
+
+def stockfish_path():
+    '''
+    The path of the Stockfish to run: `$STOCKFISH_PATH` if set, else
+    `STOCKFISH_PATH`.
+    '''
+    return os.environ.get(STOCKFISH_PATH_ENV, STOCKFISH_PATH)
+
+
+class StockfishEngine:
+    '''
+    A Stockfish process, started the first time it's asked for an
+    evaluation rather than when it's made.
+
+    Usage:
+        with benchmark_SF_eval.StockfishEngine() as engine:
+            _eval = engine.static_eval(position)
+    '''
+
+    def __init__(self, path=None):
+        # By default, `stockfish_path()` as of when the process starts.
+        self.path = path
+        self._process = None
+
+    @property
+    def process(self):
+        if self._process is None:
+            self._process = subprocess.Popen(
+                [self.path or stockfish_path()],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE
+            )
+            self._process.stdout.readline() # Prints the authors when first started.
+        return self._process
+
+    def static_eval(self, position):
+        '''
+        Stockfish's static evaluation of a position, in centipawns.
+        '''
+        p = self.process
+        p.stdin.write(('position fen ' + position.fen() + '\n').encode('utf-8'))
+        p.stdin.flush()
+        p.stdin.write(b'eval\n')
+        p.stdin.flush()
+        _eval = p.stdout.readline()
+        p.stdout.readline()
+        return int(_eval.decode())
+
+    def close(self):
+        '''
+        Quits the process, if it was started.
+        '''
+        if self._process is not None:
+            # The process may have died already, closing its end of the
+            # pipe.
+            if self._process.poll() is None:
+                try:
+                    self._process.stdin.write(b'quit\n')
+                    self._process.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    pass
+            try:
+                self._process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Used by `_stockfish_static_eval()`; importing this module starts no
+# process.
+_engine = StockfishEngine()
+atexit.register(_engine.close)
 
 def _stockfish_static_eval (position):
     '''
     Stockfish's static evaluation of a position.
 
-    Assumes that the Stockfish subprocess has already been opened;
+    Starts the Stockfish subprocess the first time it's called;
     communicates with it through stdin and stdout.
     '''
-    p.stdin.write(('position fen ' + position.fen() + '\n').encode('utf-8'))
-    p.stdin.flush()
-    p.stdin.write(b'eval\n')
-    p.stdin.flush()
-    _eval = p.stdout.readline()
-    p.stdout.readline()
-    return int(_eval.decode())
+    return _engine.static_eval(position)
+
+
+def _eval_commands(positions):
+    '''
+    The commands asking for the static evaluation of each of
+    `positions`, as one string of bytes.
+    '''
+    return b''.join(
+        ('position fen ' + position.fen() + '\neval\n').encode('utf-8')
+        for position in positions
+    )
+
+
+class EnginePool:
+    '''
+    `n_engines` Stockfish processes evaluating positions together.
+
+    Rather than writing one position and waiting for its evaluation,
+    the commands for up to `max_in_flight` positions are written to
+    each engine at once; the engines evaluate them concurrently and
+    answer in the order asked.
+
+    Usage:
+        with benchmark_SF_eval.EnginePool(4) as pool:
+            evals = pool.static_eval_batch(positions)
+
+    Parameters:
+        `max_in_flight` : int
+            The most positions asked of an engine before reading its
+            answers. Keeps the pipes from filling up and blocking.
+    '''
+
+    def __init__(self, n_engines=4, path=None, max_in_flight=256):
+        path = path or stockfish_path()
+        if n_engines < 1:
+            raise ValueError('The pool needs at least one engine.')
+        self.max_in_flight = max_in_flight
+        self.engines = []
+        for _ in range(n_engines):
+            engine = subprocess.Popen(
+                [path], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            )
+            engine.stdout.readline() # Prints the authors when first started.
+            self.engines.append(engine)
+
+    def static_eval_batch(self, positions):
+        '''
+        Stockfish's static evaluation of each of `positions`, in
+        centipawns and in the same order.
+        '''
+        positions = list(positions)
+        evals = [None] * len(positions)
+        # Deal the positions to the engines in turn, `max_in_flight`
+        # per engine per round.
+        round_size = self.max_in_flight * len(self.engines)
+        for round_start in range(0, len(positions), round_size):
+            requests = [
+                range(
+                    round_start + i * self.max_in_flight,
+                    min(
+                        round_start + (i + 1) * self.max_in_flight,
+                        len(positions)
+                    )
+                )
+                for i in range(len(self.engines))
+            ]
+            # Write to every engine before reading from any so that
+            # they all work at once.
+            for engine, indices in zip(self.engines, requests):
+                if indices:
+                    engine.stdin.write(
+                        _eval_commands(positions[i] for i in indices)
+                    )
+                    engine.stdin.flush()
+            for engine, indices in zip(self.engines, requests):
+                for i in indices:
+                    evals[i] = int(engine.stdout.readline().decode())
+                    engine.stdout.readline()
+        return evals
+
+    def close(self):
+        for engine in self.engines:
+            engine.stdin.write(b'quit\n')
+            engine.stdin.close()
+            engine.wait()
+            engine.stdout.close()
+        self.engines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncEngine:
+    '''
+    A Stockfish process driven with asyncio, so that waiting for its
+    evaluations overlaps with other work -- parsing games, extracting
+    features -- in the same event loop.
+
+    Up to `max_in_flight` positions are asked at once; their answers
+    are matched to them in the order asked. If the engine dies, or
+    doesn't answer within `timeout` seconds and is killed, it's
+    restarted -- after `restart_delay` seconds, doubling with each
+    restart -- and asked again every position still unanswered. After
+    `max_restarts` restarts over the engine's life, it's given up on:
+    every position unanswered, and every position asked after, fails
+    with a `RuntimeError`.
+
+    Usage:
+        async with benchmark_SF_eval.AsyncEngine() as engine:
+            _eval = await engine.static_eval(position)
+    '''
+
+    def __init__(
+        self, path=None, max_in_flight=64, timeout=10.0, max_restarts=3,
+        restart_delay=0.1
+    ):
+        self.path, self.timeout = path or stockfish_path(), timeout
+        self.max_restarts, self.restart_delay = max_restarts, restart_delay
+        self.n_restarts = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        # The FEN and the future of each position asked and unanswered,
+        # in the order asked.
+        self._pending = collections.deque()
+        self._process = self._reader = None
+        self._restarting = self._closing = False
+        # Set once the engine's been given up on.
+        self._error = None
+
+    async def start(self):
+        await self._spawn()
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def _spawn(self):
+        self._process = await asyncio.create_subprocess_exec(
+            self.path, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        # Prints the authors when first started. If it hangs instead,
+        # kill it; `_read()` then finds it dead.
+        try:
+            await asyncio.wait_for(
+                self._process.stdout.readline(), self.timeout
+            )
+        except asyncio.TimeoutError:
+            self._process.kill()
+
+    def _write(self, fen):
+        if self._restarting or self._process.stdin.is_closing():
+            # Asked again once the engine's restarted.
+            return
+        try:
+            self._process.stdin.write(
+                ('position fen ' + fen + '\neval\n').encode('utf-8')
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            # The engine died; `_read()` restarts it.
+            pass
+
+    async def _restart(self):
+        self._restarting = True
+        self.n_restarts += 1
+        await asyncio.sleep(self.restart_delay * 2 ** (self.n_restarts - 1))
+        try:
+            await self._spawn()
+        except OSError:
+            # The old, dead process is kept, so `_read()` finds the
+            # engine dead again.
+            pass
+        self._restarting = False
+        for fen, _ in self._pending:
+            self._write(fen)
+
+    def _give_up(self):
+        '''
+        Fails every position unanswered, and every position asked from
+        now on.
+        '''
+        self._error = RuntimeError(
+            'Stockfish (' + self.path + ') died or hung after '
+            + str(self.max_restarts) + ' restarts; gave up.'
+        )
+        while self._pending:
+            _, future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(self._error)
+
+    async def _read(self):
+        '''
+        Reads the engine's answers and gives each to the future of the
+        position it answers, restarting the engine if it dies.
+        '''
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                if self._closing:
+                    return
+                if self.n_restarts >= self.max_restarts:
+                    self._give_up()
+                    return
+                await self._restart()
+                continue
+            await self._process.stdout.readline()
+            _, future = self._pending.popleft()
+            if not future.done():
+                future.set_result(int(line.decode()))
+
+    async def static_eval(self, position):
+        '''
+        Stockfish's static evaluation of `position`, in centipawns.
+        '''
+        fen = position.fen()
+        async with self._slots:
+            if self._error is not None:
+                raise self._error
+            future = asyncio.get_event_loop().create_future()
+            self._pending.append((fen, future))
+            self._write(fen)
+            # Ends with the answer or, once `_read()` gives up on the
+            # engine, its error.
+            while True:
+                try:
+                    return await asyncio.wait_for(
+                        asyncio.shield(future), self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    # The engine hangs; kill it, and `_read()` restarts
+                    # it and asks again.
+                    if self._process.returncode is None:
+                        self._process.kill()
+
+    async def close(self):
+        self._closing = True
+        if self._process.returncode is None:
+            try:
+                self._process.stdin.write(b'quit\n')
+                self._process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            await self._process.wait()
+        self._reader.cancel()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,164 @@
+'''
+Times the extraction of the features, in all and group by group, on a
+fixed sample of positions from the games of `game_database.pgn`.
+
+The sample is checked in as `benchmark_positions.fen`, one FEN per
+line, so that timings from different commits and machines are of the
+same positions. For each backend of `extract_features.BACKENDS` the
+report gives the latency percentiles and throughput of
+`get_features()` and the time spent in each group of features,
+`_init_square_data()` included. It's printed as JSON so that runs can
+be saved and compared:
+
+    python benchmark_features.py > timings.json
+'''
+
+import json
+import os
+import sys
+import time
+import chess
+import chess.pgn
+import numpy as np
+import extract_features
+
+# Checked in beside this script.
+SAMPLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'benchmark_positions.fen'
+)
+PGN_PATH = '/Users/colinni/evAl-chess/game_database.pgn'
+
+# The groups of features in the order `get_features()` extracts them,
+# after `_init_square_data()`.
+FEATURE_GROUPS = (
+    extract_features._side_to_move,
+    extract_features._castling_rights,
+    extract_features._material_configuration,
+    extract_features._piece_lists,
+    extract_features._sliding_pieces_mobility,
+    extract_features._attack_and_defend_maps
+)
+
+def write_sample(
+    path=SAMPLE_PATH, pgn_path=PGN_PATH, n_positions=500, every=5
+):
+    '''
+    Writes every `every`-th position of the games of `pgn_path`, in
+    order, until there are `n_positions`, to `path`.
+    '''
+    fens = []
+    with open(pgn_path) as file_game_pgns:
+        while len(fens) < n_positions:
+            game = chess.pgn.read_game(file_game_pgns)
+            if game is None:
+                break
+            position = game.board()
+            for n_ply, move in enumerate(game.mainline_moves(), 1):
+                position.push(move)
+                if n_ply % every == 0:
+                    fens.append(position.fen())
+    with open(path, 'w') as file_sample:
+        file_sample.write('\n'.join(fens[ : n_positions]) + '\n')
+
+
+def read_sample(path=SAMPLE_PATH):
+    '''
+    The positions written by `write_sample()`.
+    '''
+    with open(path) as file_sample:
+        return [
+            chess.Board(line.strip())
+            for line in file_sample
+            if line.strip()
+        ]
+
+
+def _time_get_features(positions, backend):
+    '''
+    The seconds `get_features()` takes on each of `positions`.
+    '''
+    latencies = []
+    for position in positions:
+        # Extracting the features assigns members to the position.
+        position = position.copy(stack=False)
+        start = time.perf_counter()
+        extract_features.get_features(position, backend=backend)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies)
+
+
+def _time_groups(positions, backend):
+    '''
+    The total seconds spent in `_init_square_data()` and in each of
+    `FEATURE_GROUPS` over `positions`.
+    '''
+    group_times = dict.fromkeys(
+        ['_init_square_data'] + [group.__name__ for group in FEATURE_GROUPS],
+        0.0
+    )
+    for position in positions:
+        position = position.copy(stack=False)
+        start = time.perf_counter()
+        extract_features._init_square_data(position, backend)
+        group_times['_init_square_data'] += time.perf_counter() - start
+        for group in FEATURE_GROUPS:
+            start = time.perf_counter()
+            group(position)
+            group_times[group.__name__] += time.perf_counter() - start
+    return group_times
+
+
+def benchmark(positions, backend, n_repeats=3):
+    '''
+    Times the feature extraction on `positions` with `backend`, taking
+    the fastest of `n_repeats` runs of each position and of each group.
+
+    Returns:
+        dict
+            `'latency_us'`: The mean and the 50th, 90th and 99th
+            percentiles of the microseconds per position.
+            `'positions_per_second'`: The throughput.
+            `'groups'`: The microseconds per position spent in each
+            group and its fraction of the total.
+    '''
+    latencies = np.min(
+        [_time_get_features(positions, backend) for _ in range(n_repeats)],
+        axis=0
+    )
+    group_runs = [_time_groups(positions, backend) for _ in range(n_repeats)]
+    group_times = {
+        name : min(run[name] for run in group_runs)
+        for name in group_runs[0]
+    }
+    total_group_time = sum(group_times.values())
+    return {
+        'backend' : backend,
+        'n_positions' : len(positions),
+        'latency_us' : {
+            'mean' : 1e6 * float(np.mean(latencies)),
+            'p50' : 1e6 * float(np.percentile(latencies, 50)),
+            'p90' : 1e6 * float(np.percentile(latencies, 90)),
+            'p99' : 1e6 * float(np.percentile(latencies, 99))
+        },
+        'positions_per_second' : len(positions) / float(np.sum(latencies)),
+        'groups' : {
+            name : {
+                'us_per_position' : 1e6 * group_time / len(positions),
+                'fraction' : group_time / total_group_time
+            }
+            for name, group_time in group_times.items()
+        }
+    }
+
+
+if __name__ == '__main__':
+    positions = read_sample()
+    json.dump(
+        [
+            benchmark(positions, backend)
+            for backend in extract_features.BACKENDS
+        ],
+        sys.stdout,
+        indent=2
+    )
+    print()
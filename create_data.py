@@ -11,179 +11,525 @@ format -- the default -- and for each position extracts the low-level
 features using `extract_features.py` and pairs them with Stockfish's
 valuation. It then stores this data as a load-able numpy array for
 later training.
+
+With `n_processes` greater than 1, `create_data()` splits the PGN file
+into game-aligned shards and extracts the features of each in a worker
+process, so the full database no longer takes hours on one core.
 '''
 
+import asyncio
+import dataset_writer
 import extract_features
+import game_index
+import static_eval_cache
 import chess.pgn
+import chess.polyglot
+import itertools
+import json
+import multiprocessing
+import os
 import re
+import tempfile
 import time
 import pprint
 import numpy as np
 import time
 import benchmark_SF_eval
 
-def create_data(n_samples, verbose=False):
-    file_game_pgns, file_stockfish_evals = (
-        open(
-            '/Users/colinni/evAl-chess/game_database.pgn',
-            encoding='utf-8-sig',
-            errors='surrogateescape'
-        ),
-        open('/Users/colinni/evAl-chess/stockfish_evaluations.csv')
-    )
-    # Discard the first line; it contains headers.
-    file_stockfish_evals.readline()
+PGN_PATH = '/Users/colinni/evAl-chess/game_database.pgn'
+EVALS_PATH = '/Users/colinni/evAl-chess/stockfish_evaluations.csv'
+CHECKPOINT_PATH = '/Users/colinni/evAl-chess/checkpoint.json'
+
+def _parse_stockfish_evals(line):
+    '''
+    The Event number and Stockfish's evaluations of a game from its
+    line of the evaluations file.
+
+    Returns:
+        2-d tuple
+            The Event number as an `int` and a list of the evaluations
+            of each position in pawns; `None` where Stockfish found a
+            forced mate.
+    '''
+    # The lines each begin with the Event number and a comma
+    # (e.g., '451,'). Split the string by the comma and split the
+    # second part once again to get the individual numbers.
+    event, stockfish_evals = line.split(',')
+    return int(event), [
+        # The evaluations are given in centi-pawns. Convert to the more
+        # standard pawn scale.
+        float(stockfish_eval) / 100.0
+        # Stockfish gives 'NA' for forced mates.
+        if stockfish_eval != 'NA'
+        else None
+        for stockfish_eval in stockfish_evals.split()
+    ]
 
-    # The accumulated data samples.
-    data_X, data_Y = [],[]
 
+def _iter_games(file_game_pgns, file_stockfish_evals):
+    '''
+    Yields each game of `file_game_pgns` with its line of
+    `file_stockfish_evals`, both read from their current positions.
+
+    Yields:
+        3-d tuple
+            The Event number, the `chess.pgn.Game` and the evaluations
+            as returned by `_parse_stockfish_evals()`.
+    '''
     # Iterate through every game in the archive.
     curr_game = chess.pgn.read_game(file_game_pgns)
-    n_curr_sample = 0
     # (`chess.pgn.read_game()` returns None when it reaches the EOF.)
-    while curr_game is not None and n_curr_sample < n_samples:
-
-        print('\rcurr game |', n_curr_sample, end='')
-
-        # The evaluations of each position of each game.
-        stockfish_evals = (
-            # The evaluations are given in centi-pawns. Convert to the
-            # more standard pawn scale.
-            float(stockfish_eval) / 100.0
-            # Stockfish gives 'NA' for forced mates.
-            if stockfish_eval != 'NA'
-            else None
-            # The lines each begin with a number and comma
-            # (e.g., '451,') which aren't part of the evaluations.
-            # Discard by splitting the string by the comma, taking the
-            # second part, and splitting once again to get the
-            # individual numbers.
-            for stockfish_eval in (
-                file_stockfish_evals.readline()
-                .split(',')[1]
-                .split()
-            )
-        )
-
-        # Iterate through every move played using the `chess.Game`
-        # class.
-        curr_game_node = (
-            curr_game.root().variation(0)
-            if not curr_game.root().variation(0).is_end()
-            else None
+    while curr_game is not None:
+        event, stockfish_evals = _parse_stockfish_evals(
+            file_stockfish_evals.readline()
         )
-        # Setting `curr_game_node` to `None` as a flag is sloppy, but
-        # the `chess.Game` class doesn't have a better way of detecting
-        # 0-move games, which the database does contain.
-        while curr_game_node is not None and n_curr_sample < n_samples:
-            features, stockfish_eval = (
-                extract_features.get_features(
-                    curr_game_node.board(),
-                    verbose=verbose
-                ),
-                next(stockfish_evals)
-            )
-            # Stockfish gives 'NA' for forced mates, which we earlier
-            # set to `None`.
-            if stockfish_eval is not None:
-                data_X.append(features)
-                data_Y.append(stockfish_eval)
-                n_curr_sample += 1
-
-            # Set curr_game_node to the next position in the game. If
-            # it's the end of the game, set it to None as a flag.
-            curr_game_node = (
-                curr_game_node.variation(0)
-                if not curr_game_node.is_end()
-                else None
+        if event != int(curr_game.headers['Event']):
+            raise ValueError(
+                'Evaluations of Event ' + str(event) + ' paired with '
+                'the game of Event ' + curr_game.headers['Event'] + '.'
             )
+        yield event, curr_game, stockfish_evals
 
         # Get the next game in the pgn file.
         curr_game = chess.pgn.read_game(file_game_pgns)
 
-    # Convert `data_X` and `data_Y` into numpy arrays and store them
-    # in numpy's npy format. To load, `np.load(path)`.
-    np.save('../evAl-chess/X.npy', np.array(data_X).astype(float))
-    np.save('../evAl-chess/Y.npy', np.array(data_Y))
 
+def _iter_game_positions(game, stockfish_evals):
+    '''
+    Yields each position of `game` paired with its evaluation.
 
-def test_SF_evals(n_samples, verbose=False):
-    file_game_pgns, file_stockfish_evals = (
-        open(
-            '/Users/colinni/evAl-chess/game_database.pgn',
-            encoding='utf-8-sig',
-            errors='surrogateescape'
+    The game is played through on a single `chess.Board`, pushing one
+    move at a time. (`chess.pgn.GameNode.board()` replays the game from
+    the root each time it's called, which makes walking a game
+    quadratic in its length.) The same board is yielded for every
+    position, so copy it to keep a position around. 0-move games, which
+    the database does contain, yield nothing.
+    '''
+    position = game.board()
+    for move, stockfish_eval in zip(game.mainline_moves(), stockfish_evals):
+        position.push(move)
+        yield position, stockfish_eval
+
+
+def _iter_game_range(pgn_path, evals_path, start=0, stop=None):
+    '''
+    Yields the games numbered `start` up to `stop` -- counting from 0
+    in file order -- as `_iter_games()` does, seeking straight to the
+    first one with the index of `game_index.py`.
+    '''
+    with open(
+        pgn_path,
+        encoding='utf-8-sig',
+        errors='surrogateescape'
+    ) as file_game_pgns, open(evals_path) as file_stockfish_evals:
+        if start > 0:
+            game_index.seek_game(
+                game_index.load_index(pgn_path, evals_path), start,
+                file_game_pgns, file_stockfish_evals
+            )
+        else:
+            # Discard the first line; it contains headers.
+            file_stockfish_evals.readline()
+        yield from itertools.islice(
+            _iter_games(file_game_pgns, file_stockfish_evals),
+            None if stop is None else stop - start
+        )
+
+
+def iter_positions(pgn_path, evals_path, start=0, stop=None):
+    '''
+    Yields every position reached in the games of `pgn_path` paired with
+    Stockfish's evaluation of it from `evals_path`. (See
+    `_iter_game_positions()`; the same board is yielded for every
+    position of a game.)
+
+    Parameters:
+        `pgn_path` : str
+            The path of the games, in PGN format.
+        `evals_path` : str
+            The path of Stockfish's evaluations of each game, one
+            line per game.
+        `start`, `stop` : int, int or None
+            Only yields the positions of the games numbered `start` up
+            to `stop`, counting from 0 in file order. The first game is
+            seeked to directly rather than read through.
+
+    Yields:
+        2-d tuple
+            The position as a `chess.Board` and Stockfish's evaluation
+            of it in pawns; `None` if Stockfish found a forced mate.
+    '''
+    for _, game, stockfish_evals in _iter_game_range(
+        pgn_path, evals_path, start, stop
+    ):
+        yield from _iter_game_positions(game, stockfish_evals)
+
+
+def _game_samples(event, game, stockfish_evals, seed=None, verbose=False):
+    '''
+    The features and evaluations of each position of `game` that
+    Stockfish didn't find a forced mate in.
+
+    If `seed` is given, the random permutation of the piece lists (see
+    `extract_features._init_square_data()`) is seeded by `seed` and
+    `event`, so a game's samples don't depend on which games were
+    processed before it or by which process.
+
+    Returns:
+        2-d tuple
+            The features as an `np.int8` matrix and the evaluations.
+    '''
+    if seed is not None:
+        np.random.seed([seed, event])
+    game_X, game_Y, n_game_samples = (
+        np.empty(
+            (len(stockfish_evals), extract_features.N_FEATURES),
+            dtype=np.int8
         ),
-        open('/Users/colinni/evAl-chess/stockfish_evaluations.csv')
+        np.empty(len(stockfish_evals)),
+        0
     )
-    # Discard the first line; it contains headers.
-    file_stockfish_evals.readline()
+    for position, stockfish_eval in _iter_game_positions(
+        game, stockfish_evals
+    ):
+        # Stockfish gives 'NA' for forced mates, which we earlier set
+        # to `None`.
+        if stockfish_eval is not None:
+            extract_features.get_features_batch(
+                [position],
+                out=game_X[n_game_samples : n_game_samples + 1],
+                verbose=verbose
+            )
+            game_Y[n_game_samples] = stockfish_eval
+            n_game_samples += 1
+    return game_X[ : n_game_samples], game_Y[ : n_game_samples]
 
-    # The accumulated data samples.
-    data_pred, data_ground = [], []
 
-    # Iterate through every game in the archive.
-    curr_game = chess.pgn.read_game(file_game_pgns)
-    n_curr_sample = 0
-    # (`chess.pgn.read_game()` returns None when it reaches the EOF.)
-    while curr_game is not None and n_curr_sample < n_samples:
-
-        print('\rcurr game |', n_curr_sample, end='')
-
-        # The evaluations of each position of each game.
-        stockfish_evals = (
-            # The evaluations are given in centi-pawns. Convert to the
-            # more standard pawn scale.
-            float(stockfish_eval) / 100.0
-            # Stockfish gives 'NA' for forced mates.
-            if stockfish_eval != 'NA'
-            else None
-            # The lines each begin with a number and comma
-            # (e.g., '451,') which aren't part of the evaluations.
-            # Discard by splitting the string by the comma, taking the
-            # second part, and splitting once again to get the
-            # individual numbers.
-            for stockfish_eval in (
-                file_stockfish_evals.readline()
-                .split(',')[1]
-                .split()
+def _shard_ranges(pgn_path, evals_path, n_shards):
+    '''
+    Splits the games of `pgn_path` into `n_shards` or fewer ranges of
+    roughly equal size in bytes.
+
+    Returns:
+        list of 2-d tuples
+            The number of the first game of each range and of the first
+            game after it, counting from 0 in file order.
+    '''
+    pgn_offsets = game_index.load_index(pgn_path, evals_path)['pgn_offsets']
+    boundaries = np.unique(
+        np.searchsorted(
+            pgn_offsets,
+            np.linspace(0, pgn_offsets[-1], n_shards + 1)
+        )
+    ).tolist()
+    boundaries[-1] = len(pgn_offsets) - 1
+    return list(zip(boundaries[ : -1], boundaries[1 : ]))
+
+
+def _create_shard(args):
+    '''
+    Extracts the samples of one range of games (see `_shard_ranges()`)
+    and saves them to `shard_path` + '_X.npy' and '_Y.npy'. Run in a
+    worker process by `create_data()`.
+
+    Without a `seed`, numpy's random state is seeded by `shard_seed`:
+    forked workers inherit the same state, and would otherwise permute
+    the piece lists of their shards alike.
+
+    Returns:
+        `int`
+            The number of samples saved.
+    '''
+    (
+        pgn_path, evals_path, start_game, stop_game,
+        n_samples, seed, shard_seed, shard_path
+    ) = args
+    if seed is None:
+        np.random.seed(shard_seed)
+    shard_X, shard_Y, n_shard_samples = [], [], 0
+    for event, game, stockfish_evals in _iter_game_range(
+        pgn_path, evals_path, start_game, stop_game
+    ):
+        # No shard needs more samples than the whole dataset.
+        if n_shard_samples >= n_samples:
+            break
+        game_X, game_Y = _game_samples(event, game, stockfish_evals, seed)
+        shard_X.append(game_X)
+        shard_Y.append(game_Y)
+        n_shard_samples += len(game_Y)
+
+    np.save(
+        shard_path + '_X.npy',
+        np.concatenate(
+            shard_X or [np.empty((0, extract_features.N_FEATURES), np.int8)]
+        )
+    )
+    np.save(shard_path + '_Y.npy', np.concatenate(shard_Y or [np.empty(0)]))
+    return n_shard_samples
+
+
+def _save_checkpoint(checkpoint_path, checkpoint):
+    '''
+    Saves `checkpoint`, a dict, along with numpy's random state as JSON,
+    replacing the previous checkpoint only once the new one is written.
+    '''
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    with open(checkpoint_path + '.tmp', 'w') as file_checkpoint:
+        json.dump(
+            dict(
+                checkpoint,
+                random_state=[
+                    name, keys.tolist(), pos, has_gauss, cached_gaussian
+                ]
+            ),
+            file_checkpoint
+        )
+    os.replace(checkpoint_path + '.tmp', checkpoint_path)
+
+
+def _load_checkpoint(checkpoint_path):
+    '''
+    Loads a checkpoint saved by `_save_checkpoint()` and restores
+    numpy's random state from it.
+    '''
+    with open(checkpoint_path) as file_checkpoint:
+        checkpoint = json.load(file_checkpoint)
+    name, keys, pos, has_gauss, cached_gaussian = checkpoint.pop(
+        'random_state'
+    )
+    np.random.set_state(
+        (name, np.array(keys, dtype=np.uint32), pos, has_gauss, cached_gaussian)
+    )
+    return checkpoint
+
+
+def create_data(
+    n_samples, verbose=False, seed=None, n_processes=1, n_shards=None,
+    checkpoint_every=None, resume=False
+):
+    '''
+    Extracts the features and evaluations of the first `n_samples`
+    positions in the database that Stockfish didn't find a forced mate
+    in, and saves them to X.npy and Y.npy.
+
+    Parameters:
+        `n_samples` : int
+            The number of samples to create.
+        `verbose` : bool
+            Prints the features by group if True. Only for a single
+            process.
+        `seed` : int or None
+            Seeds the random permutation of the piece lists game by
+            game. Given the same seed, the data is the same regardless
+            of `n_processes`.
+        `n_processes` : int
+            The number of processes to extract the features with. With
+            more than one, the games are split into `n_shards` ranges
+            (by default, 32 per process) that worker processes seek to
+            with the index of `game_index.py` and turn into samples;
+            the shards are then merged in order.
+        `checkpoint_every` : int or None
+            Saves a checkpoint to `CHECKPOINT_PATH` every this many
+            games -- with more than one process, after every shard --
+            recording the next game, the number of samples written and
+            numpy's random state.
+        `resume` : bool
+            Resumes from the checkpoint of a run that was cut short,
+            if there is one, giving the same X.npy and Y.npy as if it
+            hadn't been. The run must have had the same `n_samples` and
+            `seed`.
+    '''
+    n_start_game, n_curr_sample = 0, 0
+    if resume and os.path.exists(CHECKPOINT_PATH):
+        checkpoint = _load_checkpoint(CHECKPOINT_PATH)
+        if (checkpoint['n_samples'], checkpoint['seed']) != (n_samples, seed):
+            raise ValueError(
+                'The checkpoint is of a run with n_samples='
+                + str(checkpoint['n_samples']) + ' and seed='
+                + str(checkpoint['seed']) + '.'
             )
+        n_start_game, n_curr_sample = (
+            checkpoint['n_game'], checkpoint['n_written']
         )
 
-        # Iterate through every move played using the `chess.Game`
-        # class.
-        curr_game_node = (
-            curr_game.root().variation(0)
-            if not curr_game.root().variation(0).is_end()
-            else None
+    # The accumulated data samples, streamed to X.npy and Y.npy block
+    # by block so memory use doesn't grow with `n_samples`. (See
+    # `dataset_writer.py`; the manifest beside them says how many
+    # samples are valid if the run is cut short.)
+    writer = dataset_writer.DatasetWriter(
+        '../evAl-chess/X.npy',
+        '../evAl-chess/Y.npy',
+        extract_features.N_FEATURES,
+        resume_at=n_curr_sample if n_start_game > 0 else None
+    )
+
+    def add_samples(samples_X, samples_Y):
+        nonlocal n_curr_sample
+        n_added = min(len(samples_Y), n_samples - n_curr_sample)
+        writer.append(samples_X[ : n_added], samples_Y[ : n_added])
+        n_curr_sample += n_added
+        print('\rcurr sample |', n_curr_sample, end='')
+
+    def save_checkpoint(n_game):
+        # Flush first so that the samples on disk are exactly those
+        # counted in the checkpoint.
+        writer.flush()
+        _save_checkpoint(
+            CHECKPOINT_PATH,
+            {
+                'n_samples' : n_samples,
+                'seed' : seed,
+                'n_game' : n_game,
+                'n_written' : n_curr_sample
+            }
         )
-        # Setting `curr_game_node` to `None` as a flag is sloppy, but
-        # the `chess.Game` class doesn't have a better way of detecting
-        # 0-move games, which the database does contain.
-        while curr_game_node is not None and n_curr_sample < n_samples:
-            stockfish_static, stockfish_eval = (
-                benchmark_SF_eval._stockfish_static_eval(
-                    curr_game_node.board()
-                ) / 100.,
-                next(stockfish_evals)
+
+    if n_processes == 1:
+        for n_game, (event, game, stockfish_evals) in enumerate(
+            _iter_game_range(PGN_PATH, EVALS_PATH, n_start_game),
+            n_start_game
+        ):
+            if n_curr_sample >= n_samples:
+                break
+            add_samples(
+                *_game_samples(event, game, stockfish_evals, seed, verbose)
             )
-            # Stockfish gives 'NA' for forced mates, which we earlier
-            # set to `None`.
-            if stockfish_eval is not None:
-                data_pred.append(stockfish_static)
-                data_ground.append(stockfish_eval)
-                n_curr_sample += 1
-
-            # Set curr_game_node to the next position in the game. If
-            # it's the end of the game, set it to None as a flag.
-            curr_game_node = (
-                curr_game_node.variation(0)
-                if not curr_game_node.is_end()
-                else None
+            if checkpoint_every and (n_game + 1) % checkpoint_every == 0:
+                save_checkpoint(n_game + 1)
+    else:
+        shard_ranges = [
+            (max(start_game, n_start_game), stop_game)
+            for start_game, stop_game in _shard_ranges(
+                PGN_PATH, EVALS_PATH, n_shards or 32 * n_processes
+            )
+            if stop_game > n_start_game
+        ]
+        shard_seeds = [
+            seed_sequence.generate_state(4)
+            for seed_sequence in np.random.SeedSequence().spawn(
+                len(shard_ranges)
             )
+        ]
+        with tempfile.TemporaryDirectory() as shard_dir, \
+                multiprocessing.Pool(n_processes) as pool:
+            shard_paths = [
+                os.path.join(shard_dir, str(n_shard))
+                for n_shard in range(len(shard_ranges))
+            ]
+            # `imap()` returns the shards in order, so merging them as
+            # they arrive gives the same data as a single process; once
+            # there are enough samples, the remaining shards are
+            # abandoned.
+            for (_, stop_game), shard_path, _ in zip(
+                shard_ranges,
+                shard_paths,
+                pool.imap(
+                    _create_shard,
+                    [
+                        (
+                            PGN_PATH, EVALS_PATH, *shard_range,
+                            n_samples, seed, shard_seed, shard_path
+                        )
+                        for shard_range, shard_seed, shard_path in zip(
+                            shard_ranges, shard_seeds, shard_paths
+                        )
+                    ]
+                )
+            ):
+                add_samples(
+                    np.load(shard_path + '_X.npy'),
+                    np.load(shard_path + '_Y.npy')
+                )
+                if n_curr_sample >= n_samples:
+                    break
+                if checkpoint_every:
+                    save_checkpoint(stop_game)
+
+    # Trim X.npy and Y.npy to the samples written. To load,
+    # `np.load(path)`. The run is done, so its checkpoint is no longer
+    # needed.
+    writer.close()
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
 
-        # Get the next game in the pgn file.
-        curr_game = chess.pgn.read_game(file_game_pgns)
+
+async def _sample_SF_evals(n_samples, cache):
+    '''
+    Stockfish's static evaluation and ground-truth evaluation of the
+    first `n_samples` positions that have one.
+
+    The static evaluations are looked up in `cache`, a
+    `static_eval_cache.StaticEvalCache`, and the rest asked of the
+    engine -- each position once, however often it comes up -- as the
+    games are parsed; the engine evaluates them while the next are
+    parsed rather than the two taking turns. Every answer is added to
+    `cache`, even if others fail.
+    '''
+    # The static evaluations, or the futures of those asked of the
+    # engine, and the future of each position asked, by key.
+    static_evals, asked, data_ground = [], {}, []
+    try:
+        async with benchmark_SF_eval.AsyncEngine() as engine:
+            for position, stockfish_eval in iter_positions(
+                PGN_PATH, EVALS_PATH
+            ):
+                if len(data_ground) >= n_samples:
+                    break
+                # Stockfish gives 'NA' for forced mates, which
+                # `iter_positions()` gives as `None`.
+                if stockfish_eval is None:
+                    continue
+
+                key = chess.polyglot.zobrist_hash(position)
+                static_eval = asked.get(key)
+                if static_eval is None:
+                    static_eval = cache.get(key)
+                if static_eval is None:
+                    # `iter_positions()` goes on to make the next move
+                    # on `position`.
+                    static_eval = asked[key] = asyncio.ensure_future(
+                        engine.static_eval(position.copy(stack=False))
+                    )
+                static_evals.append(static_eval)
+                data_ground.append(stockfish_eval)
+                print('\rcurr sample |', len(data_ground), end='')
+                # Let the engine's answers so far be read.
+                await asyncio.sleep(0)
+            await asyncio.gather(*asked.values(), return_exceptions=True)
+    finally:
+        cache.put_many(
+            (key, future.result())
+            for key, future in asked.items()
+            if future.done()
+            and not future.cancelled()
+            and future.exception() is None
+        )
+
+    # Raises the error of the first position that failed, if any.
+    data_pred = [
+        (
+            static_eval.result()
+            if isinstance(static_eval, asyncio.Future)
+            else static_eval
+        ) / 100.
+        for static_eval in static_evals
+    ]
+    return data_pred, data_ground
+
+
+def test_SF_evals(n_samples, verbose=False):
+    # The accumulated data samples. Only the positions not evaluated by
+    # an earlier run are asked of Stockfish.
+    with static_eval_cache.StaticEvalCache(
+        static_eval_cache.CACHE_PATH,
+        static_eval_cache.engine_identity(benchmark_SF_eval.stockfish_path())
+    ) as cache:
+        data_pred, data_ground = asyncio.run(
+            _sample_SF_evals(n_samples, cache)
+        )
+        if verbose:
+            print()
+            print('Static evaluations cached |', cache.hits, 'of', n_samples)
 
     # Convert `data_X` and `data_Y` into numpy arrays and store them
     # in numpy's npy format. To load, `np.load(path)`.
@@ -191,14 +537,13 @@ def test_SF_evals(n_samples, verbose=False):
     np.save('/Users/colinni/evAl-chess/evals_SF_ground.npy', np.array(data_ground).astype(float))
 
 
-
-
-test_SF_evals(2000)
-pred = np.load('/Users/colinni/evAl-chess/evals_SF_static.npy')
-ground = np.load('/Users/colinni/evAl-chess/evals_SF_ground.npy')
-pred = np.sqrt(np.abs(pred)) * (2 * (pred > 0) - 1)
-ground = np.sqrt(np.abs(ground)) * (2 * (ground > 0) - 1)
-print()
-import matplotlib.pyplot as plt
-plt.hist(np.square(pred - ground), 50)
-print(np.mean(np.square(pred - ground)))
+if __name__ == '__main__':
+    test_SF_evals(2000)
+    pred = np.load('/Users/colinni/evAl-chess/evals_SF_static.npy')
+    ground = np.load('/Users/colinni/evAl-chess/evals_SF_ground.npy')
+    pred = np.sqrt(np.abs(pred)) * (2 * (pred > 0) - 1)
+    ground = np.sqrt(np.abs(ground)) * (2 * (ground > 0) - 1)
+    print()
+    import matplotlib.pyplot as plt
+    plt.hist(np.square(pred - ground), 50)
+    print(np.mean(np.square(pred - ground)))
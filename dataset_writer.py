@@ -0,0 +1,233 @@
+'''
+Writes a dataset to disk as it's created instead of holding all of it
+in memory until the end.
+
+Samples are gathered into fixed-size blocks; each full block is
+flushed to a memory-mapped .npy file that's preallocated with
+`np.lib.format.open_memmap` and grown as needed. After every flush a
+small JSON manifest records how many rows of the files are valid, so
+the samples of a run that's killed partway are still usable:
+
+    manifest = dataset_writer.read_manifest(manifest_path)
+    X = np.load(manifest['X'], mmap_mode='r')[ : manifest['n_samples']]
+
+When the writer is closed, the files are trimmed to the number of
+samples written and become ordinary .npy files.
+
+Usage:
+    writer = dataset_writer.DatasetWriter(
+        'X.npy', 'Y.npy', extract_features.N_FEATURES
+    )
+    writer.append(samples_X, samples_Y)
+    ...
+    writer.close()
+'''
+
+import json
+import os
+import numpy as np
+
+class _GrowingNpy:
+    '''
+    A memory-mapped .npy file whose first dimension grows as rows are
+    appended.
+
+    Numpy pads .npy headers so that the length of the first dimension
+    can grow without changing the header's size (see
+    `np.lib.format.GROWTH_AXIS_MAX_DIGITS`); the file is grown by
+    rewriting the header in place and extending the data after it.
+    '''
+
+    def __init__(self, path, row_shape, dtype, capacity, reopen=False):
+        self.path, self.row_shape, self.dtype = (
+            path, tuple(row_shape), np.dtype(dtype)
+        )
+        if reopen:
+            self.memmap = np.load(path, mmap_mode='r+')
+            if (
+                self.memmap.dtype != self.dtype
+                or self.memmap.shape[1 : ] != self.row_shape
+            ):
+                raise ValueError(
+                    path + ' doesn\'t hold rows of shape '
+                    + str(self.row_shape) + ' and dtype ' + str(self.dtype)
+                    + '.'
+                )
+        else:
+            self.memmap = np.lib.format.open_memmap(
+                path, mode='w+', dtype=self.dtype,
+                shape=(capacity, ) + self.row_shape
+            )
+        self.header_size = self.memmap.offset
+        self.row_size = self.dtype.itemsize * int(np.prod(self.row_shape))
+
+    def write(self, start, rows):
+        '''
+        Writes `rows` starting at row `start`, growing the file to
+        twice its size, or more, if needed.
+        '''
+        if start + len(rows) > len(self.memmap):
+            self._resize(max(start + len(rows), 2 * len(self.memmap)))
+        self.memmap[start : start + len(rows)] = rows
+        self.memmap.flush()
+
+    def close(self, n_rows):
+        '''
+        Trims the file to its first `n_rows` rows.
+        '''
+        self._resize(n_rows, reopen=False)
+
+    def _resize(self, n_rows, reopen=True):
+        self.memmap.flush()
+        # Unmap the file before changing its size.
+        self.memmap = None
+        with open(self.path, 'r+b') as file_npy:
+            np.lib.format.write_array_header_1_0(
+                file_npy,
+                {
+                    'descr' : np.lib.format.dtype_to_descr(self.dtype),
+                    'fortran_order' : False,
+                    'shape' : (n_rows, ) + self.row_shape
+                }
+            )
+            if file_npy.tell() != self.header_size:
+                raise ValueError(
+                    'The header of ' + self.path + ' changed size; this '
+                    'version of numpy can\'t grow .npy files in place.'
+                )
+            file_npy.truncate(self.header_size + n_rows * self.row_size)
+        if reopen:
+            self.memmap = np.load(self.path, mmap_mode='r+')
+
+
+def read_manifest(manifest_path):
+    '''
+    The manifest written by a `DatasetWriter`: a dict with the paths of
+    the features, `'X'`, and of the evaluations, `'Y'`; the number of
+    valid samples, `'n_samples'`; and whether the writer was closed,
+    `'complete'`.
+    '''
+    with open(manifest_path) as file_manifest:
+        return json.load(file_manifest)
+
+
+class DatasetWriter:
+    '''
+    Appends samples -- rows of features and their evaluations -- to
+    .npy files on disk, holding at most `block_size` samples in memory.
+
+    Parameters:
+        `path_X`, `path_Y` : str, str
+            Where to write the features and evaluations.
+        `n_features` : int
+            The number of features of each sample.
+        `dtype_X`, `dtype_Y` : numpy dtypes
+            The dtypes of the features and evaluations.
+        `block_size` : int
+            The number of samples held in memory before flushing them.
+        `capacity` : int
+            The number of samples to preallocate the files for; they're
+            grown past it as needed.
+        `manifest_path` : str or None
+            Where to write the manifest. By default, 'manifest.json'
+            beside `path_X`.
+        `resume_at` : int or None
+            If given, reopens the files of an earlier writer and
+            continues writing after their first `resume_at` samples,
+            overwriting any after them.
+    '''
+
+    def __init__(
+        self, path_X, path_Y, n_features, dtype_X=np.int8, dtype_Y=float,
+        block_size=2 ** 16, capacity=2 ** 16, manifest_path=None,
+        resume_at=None
+    ):
+        self.path_X, self.path_Y, self.block_size = (
+            path_X, path_Y, block_size
+        )
+        self.manifest_path = manifest_path or os.path.join(
+            os.path.dirname(path_X), 'manifest.json'
+        )
+        reopen = resume_at is not None
+        self._npy_X = _GrowingNpy(
+            path_X, (n_features, ), dtype_X, capacity, reopen
+        )
+        self._npy_Y = _GrowingNpy(path_Y, (), dtype_Y, capacity, reopen)
+        self._block_X = np.empty((block_size, n_features), dtype=dtype_X)
+        self._block_Y = np.empty(block_size, dtype=dtype_Y)
+        # The number of samples flushed to disk and waiting in the
+        # block.
+        self.n_flushed, self._n_block = resume_at or 0, 0
+        self._write_manifest(complete=False)
+
+    @property
+    def n_samples(self):
+        '''
+        The number of samples appended so far.
+        '''
+        return self.n_flushed + self._n_block
+
+    def append(self, samples_X, samples_Y):
+        '''
+        Appends the rows of `samples_X` and the evaluations `samples_Y`,
+        flushing each block as it fills.
+        '''
+        n_appended = 0
+        while n_appended < len(samples_Y):
+            n_copied = min(
+                len(samples_Y) - n_appended,
+                self.block_size - self._n_block
+            )
+            self._block_X[self._n_block : self._n_block + n_copied] = (
+                samples_X[n_appended : n_appended + n_copied]
+            )
+            self._block_Y[self._n_block : self._n_block + n_copied] = (
+                samples_Y[n_appended : n_appended + n_copied]
+            )
+            self._n_block += n_copied
+            n_appended += n_copied
+            if self._n_block == self.block_size:
+                self.flush()
+
+    def flush(self):
+        '''
+        Writes the samples waiting in the block to disk and updates the
+        manifest.
+        '''
+        if self._n_block:
+            self._npy_X.write(self.n_flushed, self._block_X[ : self._n_block])
+            self._npy_Y.write(self.n_flushed, self._block_Y[ : self._n_block])
+            self.n_flushed += self._n_block
+            self._n_block = 0
+        self._write_manifest(complete=False)
+
+    def close(self):
+        '''
+        Flushes the remaining samples and trims the files to the number
+        of samples written.
+        '''
+        self.flush()
+        self._npy_X.close(self.n_flushed)
+        self._npy_Y.close(self.n_flushed)
+        self._write_manifest(complete=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_manifest(self, complete):
+        # Write to a temporary file and rename it so a crash never
+        # leaves a half-written manifest.
+        with open(self.manifest_path + '.tmp', 'w') as file_manifest:
+            json.dump(
+                {
+                    'X' : self.path_X,
+                    'Y' : self.path_Y,
+                    'n_samples' : self.n_flushed,
+                    'complete' : complete
+                },
+                file_manifest
+            )
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
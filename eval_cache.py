@@ -0,0 +1,75 @@
+'''
+A cache of the engine's evaluations, keyed by the Zobrist hash of the
+position evaluated (`chess.polyglot.zobrist_hash()`).
+
+Evaluating a position -- extracting its features and running the
+model -- is by far the most expensive part of a search, and the same
+positions come up again and again: by transposition, in each iteration
+of a deepening search and in the searches of consecutive moves. The
+cache holds at most `max_entries` evaluations, evicting the least
+recently used. It can be shared by searches in several threads.
+
+Usage:
+    cache = eval_cache.EvalCache(max_entries=2 ** 20)
+    evaluation = cache.get(key)
+    if evaluation is None:
+        evaluation = engine_evaluate(position)
+        cache.put(key, evaluation)
+'''
+
+import collections
+import threading
+
+class EvalCache:
+    '''
+    Members:
+        `hits`, `misses` : int, int
+            The number of lookups that found an evaluation and that
+            didn't.
+    '''
+
+    def __init__(self, max_entries=2 ** 20):
+        if max_entries < 1:
+            raise ValueError('The cache must hold at least one entry.')
+        self.max_entries = max_entries
+        self._evaluations = collections.OrderedDict()
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._evaluations)
+
+    @property
+    def hit_rate(self):
+        n_lookups = self.hits + self.misses
+        return self.hits / n_lookups if n_lookups else 0.0
+
+    def get(self, key):
+        '''
+        The evaluation of the position with Zobrist hash `key`, or
+        `None` if it isn't cached.
+        '''
+        with self._lock:
+            evaluation = self._evaluations.get(key)
+            if evaluation is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._evaluations.move_to_end(key)
+            return evaluation
+
+    def put(self, key, evaluation):
+        '''
+        Caches `evaluation`, evicting the least recently used
+        evaluation if the cache is full.
+        '''
+        with self._lock:
+            self._evaluations[key] = evaluation
+            self._evaluations.move_to_end(key)
+            if len(self._evaluations) > self.max_entries:
+                self._evaluations.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._evaluations.clear()
+            self.hits = self.misses = 0
@@ -0,0 +1,306 @@
+'''
+Evaluates the positions of many concurrent searches together.
+
+A search that evaluates its positions one at a time pays the overhead
+of a call to the model for each. An `EvalServer` collects the positions
+-- or their already-extracted features -- submitted by any number of
+threads in a queue and evaluates them in batches -- one
+`extract_features.get_features_batch()` and one forward pass of the
+model per batch -- as soon as either `max_batch_size` positions are
+waiting or the oldest has waited `max_latency` seconds. Each submission
+returns a `concurrent.futures.Future` of its evaluation.
+
+Searches share a server through the `evaluator` of
+`basic_engine.alpha_beta()`: `EvalServer.evaluate_batch` from threads
+of the same process, or the `ProcessClient`s of
+`EvalServer.process_clients()` from other processes, such as those of
+`basic_engine.make_search_pool()`.
+
+Usage:
+    with eval_server.EvalServer(model) as server:
+        # From any thread.
+        future = server.submit(position)
+        ...
+        evaluation = future.result()
+
+        # Or, in searches run from any thread.
+        basic_engine.alpha_beta(
+            position, depth, evaluator=server.evaluate_batch
+        )
+'''
+
+import concurrent.futures
+import multiprocessing
+import queue
+import threading
+import time
+import numpy as np
+import extract_features
+
+# Put on the queue to stop the server.
+_STOP = object()
+
+class EvalServer:
+    '''
+    Parameters:
+        `model` : `numpy_model.NumpyModel`
+            Evaluates rows of features; see `numpy_model.load_model()`.
+        `max_batch_size` : int
+            The most positions to evaluate in one batch.
+        `max_latency` : float
+            The most seconds a position waits for a batch to fill.
+        `backend` : str
+            The backend to extract the features with; see
+            `extract_features.BACKENDS`.
+
+    Members:
+        `n_requests`, `n_batches` : int, int
+            The number of positions evaluated and of batches they were
+            evaluated in.
+    '''
+
+    def __init__(
+        self, model, max_batch_size=256, max_latency=0.002,
+        backend='bitboard'
+    ):
+        if max_batch_size < 1:
+            raise ValueError('A batch must hold at least one position.')
+        self.model = model
+        self.max_batch_size, self.max_latency = max_batch_size, max_latency
+        self.backend = backend
+        self.n_requests = self.n_batches = 0
+        self._requests = queue.Queue()
+        self._closed = False
+        # The request queue and thread of each set of process clients.
+        self._relays = []
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    @property
+    def mean_batch_size(self):
+        return self.n_requests / self.n_batches if self.n_batches else 0.0
+
+    def submit(self, position):
+        '''
+        Queues `position` to be evaluated.
+
+        Returns:
+            `concurrent.futures.Future`
+                The future of the evaluation, a float.
+        '''
+        if self._closed:
+            raise ValueError('The server is closed.')
+        future = concurrent.futures.Future()
+        # Copy the position: the caller may go on making moves on it,
+        # and extracting the features assigns members to it.
+        self._requests.put((position.copy(stack=False), None, future))
+        return future
+
+    def submit_features(self, features):
+        '''
+        Queues a position to be evaluated by its features -- e.g.,
+        those kept by an `incremental_features.FeatureAccumulator`.
+
+        Returns:
+            `concurrent.futures.Future`
+                The future of the evaluation, a float.
+        '''
+        if self._closed:
+            raise ValueError('The server is closed.')
+        future = concurrent.futures.Future()
+        self._requests.put((None, list(features), future))
+        return future
+
+    def evaluate_batch(self, features_batch):
+        '''
+        The evaluations of the rows of `features_batch`, waiting for
+        their batches. Can be given as the `evaluator` of
+        `basic_engine.alpha_beta()`.
+
+        Returns:
+            numpy array of floats
+        '''
+        futures = [
+            self.submit_features(features) for features in features_batch
+        ]
+        return np.array([future.result() for future in futures])
+
+    def process_clients(self, n_clients):
+        '''
+        `n_clients` evaluators for other processes, each to be used by
+        one process at a time. Pass them to the processes when they're
+        started, e.g. as the arguments of a pool's initializer.
+
+        Returns:
+            list of `ProcessClient`s
+        '''
+        if self._closed:
+            raise ValueError('The server is closed.')
+        requests = multiprocessing.Queue()
+        responses = [multiprocessing.Queue() for _ in range(n_clients)]
+        relay = threading.Thread(
+            target=self._relay, args=(requests, responses), daemon=True
+        )
+        relay.start()
+        self._relays.append((requests, relay))
+        return [
+            ProcessClient(client_id, requests, client_responses)
+            for client_id, client_responses in enumerate(responses)
+        ]
+
+    def evaluate(self, position):
+        '''
+        The evaluation of `position`, waiting for its batch.
+        '''
+        return self.submit(position).result()
+
+    def close(self):
+        '''
+        Evaluates the positions already submitted and stops the server.
+        '''
+        if not self._closed:
+            self._closed = True
+            # Stop taking requests from other processes first; those
+            # already taken are still evaluated.
+            for requests, relay in self._relays:
+                requests.put(None)
+                relay.join()
+            self._requests.put(_STOP)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _next_batch(self):
+        '''
+        Waits for a request, then collects more until the batch is full
+        or the first request has waited `max_latency`.
+
+        Returns:
+            2-d tuple
+                The list of requests and whether the server was stopped.
+        '''
+        request = self._requests.get()
+        if request is _STOP:
+            return [], True
+        batch = [request]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is _STOP:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _relay(self, requests, responses):
+        '''
+        Submits the rows of features each process client sends and
+        sends back their evaluations, or the error, once all are made.
+        '''
+        while True:
+            request = requests.get()
+            if request is None:
+                return
+            client_id, features_batch = request
+            futures = [
+                self.submit_features(features) for features in features_batch
+            ]
+            self._respond_when_done(futures, responses[client_id])
+
+    def _respond_when_done(self, futures, responses):
+        n_remaining, lock = [len(futures)], threading.Lock()
+
+        def on_done(_):
+            with lock:
+                n_remaining[0] -= 1
+                if n_remaining[0]:
+                    return
+            try:
+                responses.put([future.result() for future in futures])
+            except Exception as error:
+                responses.put(error)
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def _serve(self):
+        stopped = False
+        while not stopped:
+            batch, stopped = self._next_batch()
+            if not batch:
+                continue
+            positions, features_batch, futures = zip(*batch)
+            try:
+                # Extract the features of the positions submitted
+                # without them.
+                extracted = iter(
+                    extract_features.get_features_batch(
+                        [
+                            position
+                            for position, features in zip(
+                                positions, features_batch
+                            )
+                            if features is None
+                        ],
+                        backend=self.backend
+                    )
+                    if None in features_batch
+                    else []
+                )
+                evaluations = self.model.evaluate(
+                    np.array(
+                        [
+                            features if features is not None
+                            else next(extracted)
+                            for features in features_batch
+                        ],
+                        dtype=float
+                    )
+                )
+            except Exception as error:
+                for future in futures:
+                    future.set_exception(error)
+                continue
+            for future, evaluation in zip(futures, evaluations):
+                future.set_result(float(evaluation))
+            self.n_requests += len(batch)
+            self.n_batches += 1
+
+
+class ProcessClient:
+    '''
+    Evaluates rows of features with an `EvalServer` in another process,
+    through `multiprocessing` queues. Made by
+    `EvalServer.process_clients()`; used by one process at a time.
+    '''
+
+    def __init__(self, client_id, requests, responses):
+        self.client_id = client_id
+        self._requests, self._responses = requests, responses
+
+    def evaluate_batch(self, features_batch):
+        '''
+        The evaluations of the rows of `features_batch`, waiting for
+        the server. Can be given as the `evaluator` of
+        `basic_engine.alpha_beta()`.
+
+        Returns:
+            numpy array of floats
+        '''
+        features_batch = [list(features) for features in features_batch]
+        if not features_batch:
+            return np.empty(0)
+        self._requests.put((self.client_id, features_batch))
+        response = self._responses.get()
+        if isinstance(response, Exception):
+            raise response
+        return np.array(response)
@@ -75,8 +75,21 @@ FEATURE_MODALITY_SIZES = (0, 17, 244, 128)
 FEATURE_MODALITY_SPLIT_POINTS = tuple(
     itertools.accumulate(FEATURE_MODALITY_SIZES)
 )
+N_FEATURES = FEATURE_MODALITY_SPLIT_POINTS[-1]
 
-def get_features(position, verbose=False):
+# The relative value of each piece.
+RELATIVE_VALS = {
+    'P' : 1, 'N' : 2, 'B' : 3, 'R' : 4, 'Q' : 5, 'K' : 6,
+    'p' : 1, 'n' : 2, 'b' : 3, 'r' : 4, 'q' : 5, 'k' : 6
+}
+
+# The ways of calculating the attackers and sliding-piece scopes; see
+# `__init_attackers_and_scope()` and
+# `__init_attackers_and_scope_bitboard()`. Both yield the same
+# features.
+BACKENDS = ('array', 'bitboard')
+
+def get_features(position, verbose=False, backend='array'):
     '''
     Returns a list of low-level features of `position` to be used for
     training. (See individual docstrings for more information.)
@@ -88,12 +101,14 @@ def get_features(position, verbose=False):
             The position from which to extract features.
         `verbose` : bool
             Prints the features by group if True.
+        `backend` : one of `BACKENDS`
+            How to calculate the attackers and sliding-piece scopes.
 
     Returns:
         list of `int`s, length on the order of 300
             The selected features of `position`.
     '''
-    _init_square_data(position)
+    _init_square_data(position, backend)
     features = (
         []
         + _side_to_move(position, verbose)
@@ -105,6 +120,67 @@ def get_features(position, verbose=False):
     )
     return features
 
+def get_features_batch(
+    boards, out=None, dtype=np.int8, verbose=False, backend='array'
+):
+    '''
+    Writes the features of each position in `boards` into a row of
+    `out`, the same features `get_features()` returns but without
+    building a list for each position. Each group of features is
+    written straight into its place in the row, starting from the
+    offsets in `FEATURE_MODALITY_SPLIT_POINTS`.
+
+    Every feature fits in an `np.int8`, so a compact matrix can be
+    preallocated once -- e.g., for a whole dataset -- and filled in
+    place.
+
+    Warning: assigns new members to each position.
+
+    Parameters:
+        `boards` : iterable of `chess.Board` instances
+            The positions from which to extract features.
+        `out` : numpy array of shape `(n, N_FEATURES)` or None
+            Where to write the features; `n` must be at least the
+            number of positions. If None, a new array is allocated.
+        `dtype` : numpy dtype
+            The dtype of the allocated array if `out` is None.
+        `verbose` : bool
+            Prints the features by group if True.
+        `backend` : one of `BACKENDS`
+            How to calculate the attackers and sliding-piece scopes.
+
+    Returns:
+        numpy array of shape `(len(boards), N_FEATURES)`
+            The rows of `out` that were written.
+    '''
+    if out is None:
+        boards = list(boards)
+        out = np.empty((len(boards), N_FEATURES), dtype=dtype)
+
+    # The groups of features, in order, making up each modality.
+    modality_groups = (
+        (_side_to_move, _castling_rights, _material_configuration),
+        (_piece_lists, _sliding_pieces_mobility),
+        (_attack_and_defend_maps, )
+    )
+
+    n_boards = 0
+    for n_boards, position in enumerate(boards, 1):
+        if n_boards > len(out):
+            raise ValueError(
+                'More positions than the ' + str(len(out)) + ' rows of `out`.'
+            )
+        row = out[n_boards - 1]
+        _init_square_data(position, backend)
+        for start, groups in zip(
+            FEATURE_MODALITY_SPLIT_POINTS, modality_groups
+        ):
+            for group in groups:
+                features = group(position, verbose)
+                row[start : start + len(features)] = features
+                start += len(features)
+    return out[ : n_boards]
+
 def split_features(features):
     '''
     Split `features` into groups of features with the same modality.
@@ -150,7 +226,7 @@ def __init_attackers_and_scope(position, piece_squares):
     Kaggle (see `create_data.py`). This method improves the time to
     around 3e-3 seconds per position; still, that would take around 2
     hours for the 2-million positions. For now, we use just 200,000
-    positions.
+    positions. (For measured timings, run `benchmark_features.py`.)
 
     TODO: Use Stockfish's code. (Major pain.)
     '''
@@ -222,12 +298,6 @@ def __init_attackers_and_scope(position, piece_squares):
             j += dj
         return scope
 
-    # The relative value of each piece.
-    relative_vals = {
-        'P' : 1, 'N' : 2, 'B' : 3, 'R' : 4, 'Q' : 5, 'K' : 6,
-        'p' : 1, 'n' : 2, 'b' : 3, 'r' : 4, 'q' : 5, 'k' : 6
-    }
-
     # How far each sliding piece can move in each direction.
     position.sliding_piece_scopes = {
         (sliding_piece, square) : []
@@ -261,7 +331,7 @@ def __init_attackers_and_scope(position, piece_squares):
                         arr, piece_color,
                         i, di,
                         j, dj,
-                        relative_vals[piece]
+                        RELATIVE_VALS[piece]
                     )
                     position.sliding_piece_scopes[(piece, square)].append(
                         scope
@@ -274,7 +344,7 @@ def __init_attackers_and_scope(position, piece_squares):
                 for square in piece_squares[piece]
             ):
                 for di, dj in chess.PIECE_MOVEMENTS[piece]:
-                    assign(arr, i + di, j + dj, relative_vals[piece])
+                    assign(arr, i + di, j + dj, RELATIVE_VALS[piece])
 
     position.min_attacker_of = [
         (j, i)
@@ -284,8 +354,109 @@ def __init_attackers_and_scope(position, piece_squares):
         )
     ]
 
+# For each direction a sliding piece can move in -- the `(di, dj)`'s of
+# `chess.PIECE_MOVEMENTS['Q']` -- the squares in that direction from
+# each square as a bitboard, ignoring the pieces on the board.
+__RAYS = {
+    (di, dj) : [
+        sum(
+            chess.BB_SQUARES[8 * (8 - (i + k * di) - 1) + (j + k * dj)]
+            for k in range(1, 8)
+            if 0 <= i + k * di < 8 and 0 <= j + k * dj < 8
+        )
+        for i, j in (
+            (8 - square // 8 - 1, square % 8)
+            for square in chess.SQUARES
+        )
+    ]
+    for di, dj in chess.PIECE_MOVEMENTS['Q']
+}
+
 
-def _init_square_data(position):
+def _sliding_piece_scope(position, sliding_piece, square):
+    '''
+    How far `sliding_piece` on `square` can slide in each of its
+    directions, in the order of `chess.PIECE_MOVEMENTS[sliding_piece]`;
+    see `position.sliding_piece_scopes` in
+    `__init_attackers_and_scope()`.
+    '''
+    own_pieces = position.occupied_co[sliding_piece in chess.WHITE_PIECES]
+    scopes = []
+    for di, dj in chess.PIECE_MOVEMENTS[sliding_piece]:
+        ray = __RAYS[(di, dj)][square]
+        blockers = ray & position.occupied
+        if not blockers:
+            scopes.append(chess.popcount(ray))
+            continue
+        # Moving down a row, `di == +1`, means moving toward lower
+        # squares.
+        blocker = (
+            chess.msb(blockers)
+            if -8 * di + dj < 0
+            else chess.lsb(blockers)
+        )
+        scopes.append(
+            chess.square_distance(square, blocker)
+            - (own_pieces & chess.BB_SQUARES[blocker] != 0)
+        )
+    return scopes
+
+
+def __init_attackers_and_scope_bitboard(position, piece_squares):
+    '''
+    Calculates the same `position.min_attacker_of` and
+    `position.sliding_piece_scopes` as `__init_attackers_and_scope()`
+    but from python-chess's 64-bit integer bitboards rather than by
+    walking an 8x8 array. On the sample of `benchmark_features.py`,
+    that takes about 60 microseconds per position against about 100,
+    though the whole of `get_features()` only drops from about 260 to
+    220 -- the rest is the other groups of features.
+
+    The lowest-valued attackers are found by taking each piece type in
+    increasing value -- conveniently, `chess.PAWN` through `chess.KING`
+    are 1 through 6, the same as the relative values -- and assigning
+    its value to the squares it attacks that no lower-valued piece
+    already does.
+
+    The scopes are found by intersecting each of the precomputed rays
+    in `__RAYS` with the occupied squares; the nearest blocker is the
+    least significant bit if the ray runs toward higher squares and the
+    most significant bit otherwise.
+    '''
+    min_attacker_vals = ([0] * 64, [0] * 64)
+    for color in chess.COLORS:
+        vals, covered = min_attacker_vals[color], 0
+        for piece_type in chess.PIECE_TYPES:
+            attacks = 0
+            for square in chess.scan_forward(
+                position.pieces_mask(piece_type, color)
+            ):
+                attacks |= position.attacks_mask(square)
+            # `__init_attackers_and_scope()` flattens its row-major
+            # arrays, so its indices are the squares mirrored
+            # vertically; index the same way to give the same features.
+            for square in chess.scan_forward(attacks & ~covered):
+                vals[chess.square_mirror(square)] = piece_type
+            covered |= attacks
+
+    position.sliding_piece_scopes = {
+        (sliding_piece, square) : _sliding_piece_scope(
+            position, sliding_piece, square
+        )
+        for sliding_piece in chess.SLIDING_PIECES
+        for square in piece_squares[sliding_piece]
+    }
+
+    # Indexed by color, so black first.
+    position.min_attacker_of = list(
+        zip(
+            min_attacker_vals[chess.BLACK],
+            min_attacker_vals[chess.WHITE]
+        )
+    )
+
+
+def _init_square_data(position, backend='array'):
     '''
     Calculates some basic information of the position and stores it in
     `position`.
@@ -302,17 +473,29 @@ def _init_square_data(position):
         -- 'P', 'N', 'B' ... 'p', 'n', 'b' ... -- but their squares are
         randomly permuted. As a result, the first 8 pieces are
         guaranteed to be 'P' but their squares random.
+
+        If there are more pieces of a kind than `chess.PIECE_CAPACITY`
+        -- say, a third queen -- the extra pieces, picked at random, are
+        left out, so the features always number `N_FEATURES`.
     '''
-    # The squares of the pieces on the board.
-    piece_squares = { piece : [] for piece in chess.PIECES }
-    for square in chess.SQUARES:
-        piece = position.piece_at(square)
-        if piece is not None:
-            piece_squares[piece.symbol()].append(square)
+    # The squares of the pieces on the board, in increasing order, from
+    # the bitboard of each piece rather than by asking each square.
+    piece_squares = {
+        chess.Piece(piece_type, color).symbol() : list(
+            chess.scan_forward(position.pieces_mask(piece_type, color))
+        )
+        for color in chess.COLORS
+        for piece_type in chess.PIECE_TYPES
+    }
 
     # Pass `piece_squares` before adding the missing pieces' squares.
     # This is a bit ugly, I know.
-    __init_attackers_and_scope(position, piece_squares)
+    if backend == 'array':
+        __init_attackers_and_scope(position, piece_squares)
+    elif backend == 'bitboard':
+        __init_attackers_and_scope_bitboard(position, piece_squares)
+    else:
+        raise ValueError('Unknown backend: ' + repr(backend))
 
     # Add the missing pieces and their squares,
     # `chess.MISSING_PIECE_SQUARE`.
@@ -323,11 +506,15 @@ def _init_square_data(position):
         )
 
     # Set to `position.piece_squares` with the pieces ordered correctly
-    # and the squares of each piece permuted.
+    # and the squares of each piece permuted, less any extra pieces.
+    # Shuffling the lists in place draws the same random numbers as
+    # `np.random.permutation()` but is a few times faster.
+    for piece in chess.PIECES:
+        np.random.shuffle(piece_squares[piece])
     position.piece_squares = [
         (piece, square)
         for piece in chess.PIECES
-        for square in np.random.permutation(piece_squares[piece]).tolist()
+        for square in piece_squares[piece][ : chess.PIECE_CAPACITY[piece]]
     ]
 
 
@@ -426,7 +613,8 @@ def _piece_lists(position, verbose=False):
     (*) Yes, it's technically possible to have, say, 10 knights per
     side. But in practice having an extra queen and knight slot is
     enough unless you're somehow in a position where you need to
-    underpromote a pawn in the opening or middlegame.
+    underpromote a pawn in the opening or middlegame. Any extra pieces
+    are left out; see `_init_square_data()`.
     '''
     piece_lists = list(
         sum(
@@ -0,0 +1,120 @@
+'''
+Indexes where each game starts in the PGN file and where its line of
+evaluations starts in the evaluations file, so that any game -- or
+range of games -- can be seeked to directly instead of parsing the
+files from the beginning.
+
+The index is built once, by scanning both files, and saved beside the
+PGN file as `<pgn_path>.index.npz`. It's rebuilt automatically if
+either file changes.
+
+Usage:
+    import game_index
+
+    index = game_index.load_index(pgn_path, evals_path)
+    game_index.seek_game(
+        index, 100, file_game_pgns, file_stockfish_evals
+    )
+'''
+
+import os
+import numpy as np
+
+# The line of the PGN file each game begins with.
+GAME_HEADER = b'[Event "'
+
+def index_path(pgn_path):
+    '''
+    Where the index of `pgn_path` is saved.
+    '''
+    return pgn_path + '.index.npz'
+
+
+def _file_stamps(pgn_path, evals_path):
+    '''
+    The sizes and modification times of both files, to tell whether an
+    index is out of date.
+    '''
+    return np.array(
+        [
+            stat
+            for path in (pgn_path, evals_path)
+            for stat in (os.stat(path).st_size, os.stat(path).st_mtime_ns)
+        ],
+        dtype=np.int64
+    )
+
+
+def build_index(pgn_path, evals_path):
+    '''
+    Scans both files for the byte offset of each game and of each line
+    of evaluations, and saves them to `index_path(pgn_path)`.
+
+    Returns:
+        dict of numpy arrays
+            `'events'`: The Event number of each game.
+            `'pgn_offsets'`: The byte offset of each game in
+            `pgn_path`, followed by the size of the file.
+            `'evals_offsets'`: The byte offset of each game's line in
+            `evals_path`, followed by the size of the file.
+    '''
+    events, pgn_offsets = [], []
+    with open(pgn_path, 'rb') as file_game_pgns:
+        offset = 0
+        for line in file_game_pgns:
+            if line.startswith(GAME_HEADER):
+                events.append(int(line[len(GAME_HEADER) : ].split(b'"')[0]))
+                pgn_offsets.append(offset)
+            offset += len(line)
+        pgn_offsets.append(offset)
+
+    evals_events, evals_offsets = [], []
+    with open(evals_path, 'rb') as file_stockfish_evals:
+        # Skip the first line; it contains headers.
+        offset = len(file_stockfish_evals.readline())
+        for line in file_stockfish_evals:
+            if line.strip():
+                evals_events.append(int(line.split(b',')[0]))
+                evals_offsets.append(offset)
+            offset += len(line)
+        evals_offsets.append(offset)
+
+    if events != evals_events:
+        raise ValueError(
+            'The games of ' + pgn_path + ' and the evaluations of '
+            + evals_path + ' have different Event numbers.'
+        )
+
+    index = {
+        'events' : np.array(events, dtype=np.int64),
+        'pgn_offsets' : np.array(pgn_offsets, dtype=np.int64),
+        'evals_offsets' : np.array(evals_offsets, dtype=np.int64),
+        'stamps' : _file_stamps(pgn_path, evals_path)
+    }
+    np.savez(index_path(pgn_path), **index)
+    return index
+
+
+def load_index(pgn_path, evals_path):
+    '''
+    The index of `pgn_path` and `evals_path` as returned by
+    `build_index()`, building it if it doesn't exist or is out of date.
+    '''
+    if os.path.exists(index_path(pgn_path)):
+        with np.load(index_path(pgn_path)) as saved_index:
+            index = dict(saved_index)
+        if np.array_equal(
+            index['stamps'], _file_stamps(pgn_path, evals_path)
+        ):
+            return index
+    return build_index(pgn_path, evals_path)
+
+
+def seek_game(index, n_game, file_game_pgns, file_stockfish_evals):
+    '''
+    Moves both open files to the start of game number `n_game` --
+    counting from 0 in file order, not the Event number -- so that
+    the next game and line read are those of that game.
+    '''
+    file_game_pgns.seek(int(index['pgn_offsets'][n_game]))
+    file_stockfish_evals.seek(int(index['evals_offsets'][n_game]))
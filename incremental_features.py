@@ -0,0 +1,333 @@
+'''
+Keeps the features of a position up to date as moves are made and
+unmade, rather than extracting them from scratch for every position.
+
+A search visits positions that differ from their parent by a single
+move, and a single move changes only a handful of squares: the squares
+the moving pieces leave and land on, plus the squares attacked by those
+pieces and by the sliding pieces whose rays pass through them. The
+`FeatureAccumulator` updates just those features on `push()` and
+restores them on `pop()`.
+
+The features are the same as those of `extract_features.get_features()`
+except that each piece keeps its slot in the piece lists for as long as
+it's on the board instead of the slots being randomly permuted for
+every position.
+
+Usage:
+    import chess
+    import incremental_features
+
+    accumulator = incremental_features.FeatureAccumulator(chess.Board())
+    accumulator.push(chess.Move.from_uci('e2e4'))
+    features = accumulator.features
+    accumulator.pop()
+'''
+
+import chess
+import extract_features
+
+# Where each group of features starts; see `extract_features.py`.
+_CASTLING_RIGHTS_START = 1
+_MATERIAL_START = 5
+_PIECE_LISTS_START = extract_features.FEATURE_MODALITY_SPLIT_POINTS[1]
+_MOBILITY_START = (
+    _PIECE_LISTS_START + 5 * sum(chess.PIECE_CAPACITY.values())
+)
+_ATTACK_MAPS_START = {
+    chess.BLACK : extract_features.FEATURE_MODALITY_SPLIT_POINTS[2],
+    chess.WHITE : extract_features.FEATURE_MODALITY_SPLIT_POINTS[2] + 64
+}
+
+# The piece of each slot of the piece lists, in order, and where each
+# sliding piece's slot starts in the sliding-piece mobilities.
+_SLOT_PIECES = tuple(
+    piece
+    for piece in chess.PIECES
+    for _ in range(chess.PIECE_CAPACITY[piece])
+)
+_MOBILITY_STARTS = {}
+for slot, piece in enumerate(_SLOT_PIECES):
+    if piece in chess.SLIDING_PIECES:
+        _MOBILITY_STARTS[slot] = _MOBILITY_START + sum(
+            len(chess.PIECE_MOVEMENTS[other_piece])
+            for other_piece in _SLOT_PIECES[ : slot]
+            if other_piece in chess.SLIDING_PIECES
+        )
+
+
+class FeatureAccumulator:
+    '''
+    A position and its features, updated incrementally as moves are
+    pushed and popped.
+
+    Members:
+        `board` : a `chess.Board` instance
+            The current position. Make and unmake moves through
+            `push()` and `pop()` rather than on `board` directly.
+        `features` : list of `int`s, length `N_FEATURES`
+            The features of `board`. Updated in place, so copy it to
+            keep the features of a given position.
+    '''
+
+    def __init__(self, board):
+        self.board = board.copy()
+        self._stack = []
+        self._refresh()
+
+    def _refresh(self):
+        '''
+        Extracts the features from scratch and sets up the slot and
+        attack information that `push()` updates.
+        '''
+        position = self.board.copy(stack=False)
+        self.features = extract_features.get_features(
+            position, backend='bitboard'
+        )
+
+        # Which slot of the piece lists the piece on each square has,
+        # which slots of each piece are empty and which pieces have no
+        # slot -- the extra pieces when there are more than slots.
+        self._slot_of_square, self._free_slots = {}, {}
+        self._unslotted = {}
+        for piece in chess.PIECES:
+            slots = [
+                slot
+                for slot, slot_piece in enumerate(_SLOT_PIECES)
+                if slot_piece == piece
+            ]
+            squares = [
+                square
+                for other_piece, square in position.piece_squares
+                if other_piece == piece
+            ]
+            for slot, square in zip(slots, squares):
+                if square != chess.MISSING_PIECE_SQUARE:
+                    self._slot_of_square[square] = slot
+            self._free_slots[piece] = tuple(
+                slot
+                for slot, square in zip(slots, squares)
+                if square == chess.MISSING_PIECE_SQUARE
+            )
+            # `get_features()` leaves the extra pieces out.
+            color_piece = chess.Piece.from_symbol(piece)
+            self._unslotted[piece] = tuple(
+                square
+                for square in chess.scan_forward(
+                    position.pieces_mask(
+                        color_piece.piece_type, color_piece.color
+                    )
+                )
+                if square not in squares
+            )
+
+        # The squares attacked by the piece on each square.
+        self._attacks = {
+            square : self.board.attacks_mask(square)
+            for square in chess.scan_forward(self.board.occupied)
+        }
+
+    def push(self, move):
+        '''
+        Makes `move` on `board` and updates `features`.
+        '''
+        board = self.board
+        self._stack.append(
+            (
+                list(self.features),
+                dict(self._slot_of_square),
+                dict(self._free_slots),
+                dict(self._unslotted),
+                dict(self._attacks)
+            )
+        )
+
+        masks_before = [
+            board.pieces_mask(piece_type, color)
+            for color in chess.COLORS
+            for piece_type in chess.PIECE_TYPES
+        ]
+        white_before = board.occupied_co[chess.WHITE]
+        board.push(move)
+
+        features = self.features
+        features[0] = board.turn
+        features[_CASTLING_RIGHTS_START : _MATERIAL_START] = [
+            board.has_kingside_castling_rights(chess.WHITE),
+            board.has_kingside_castling_rights(chess.BLACK),
+            board.has_queenside_castling_rights(chess.WHITE),
+            board.has_queenside_castling_rights(chess.BLACK)
+        ]
+
+        # Move the pieces between slots. A piece that left one square
+        # and arrived on another of the same kind moved and keeps its
+        # slot; otherwise it was captured or promoted and frees its
+        # slot, or was promoted to and takes a free one. Free the slots
+        # first so a capturing piece doesn't land on the slot of the
+        # piece it captured.
+        changed, moved_to, moves, arrivals = 0, 0, [], []
+        for (color, piece_type), mask_before in zip(
+            (
+                (color, piece_type)
+                for color in chess.COLORS
+                for piece_type in chess.PIECE_TYPES
+            ),
+            masks_before
+        ):
+            mask_after = board.pieces_mask(piece_type, color)
+            if mask_before == mask_after:
+                continue
+            changed |= mask_before ^ mask_after
+            piece = chess.Piece(piece_type, color).symbol()
+            features[_MATERIAL_START + chess.PIECES.index(piece)] = (
+                chess.popcount(mask_after)
+            )
+            left, arrived = mask_before & ~mask_after, mask_after & ~mask_before
+            moved_to |= arrived
+            if chess.popcount(left) == 1 and chess.popcount(arrived) == 1:
+                moves.append((piece, chess.lsb(left), chess.lsb(arrived)))
+                continue
+            for square in chess.scan_forward(left):
+                slot = self._slot_of_square.pop(square, None)
+                if slot is not None:
+                    self._free_slot(slot)
+                else:
+                    self._unslotted[piece] = tuple(
+                        other_square
+                        for other_square in self._unslotted[piece]
+                        if other_square != square
+                    )
+            arrivals += [
+                (piece, square) for square in chess.scan_forward(arrived)
+            ]
+        for piece, from_square, to_square in moves:
+            slot = self._slot_of_square.pop(from_square, None)
+            if slot is not None:
+                self._slot_of_square[to_square] = slot
+            elif from_square in self._unslotted[piece]:
+                self._unslotted[piece] = tuple(
+                    to_square if square == from_square else square
+                    for square in self._unslotted[piece]
+                )
+        # With more pieces than slots -- say, a third queen -- the
+        # extra piece is left out of the piece lists until a slot of
+        # its kind frees up.
+        for piece, square in arrivals:
+            self._unslotted[piece] += (square, )
+        newly_slotted = 0
+        for piece, squares in self._unslotted.items():
+            while squares and self._free_slots[piece]:
+                slot = self._free_slots[piece][0]
+                self._free_slots[piece] = self._free_slots[piece][1 : ]
+                self._slot_of_square[squares[0]] = slot
+                newly_slotted |= chess.BB_SQUARES[squares[0]]
+                squares = squares[1 : ]
+            self._unslotted[piece] = squares
+
+        # The pieces whose attacks may have changed: those on the
+        # changed squares and the sliding pieces whose rays reached
+        # them.
+        dirty = {chess.WHITE : 0, chess.BLACK : 0}
+        for square in chess.scan_forward(changed):
+            attacks = self._attacks.pop(square, 0)
+            if attacks:
+                dirty[bool(white_before & chess.BB_SQUARES[square])] |= (
+                    attacks
+                )
+        sliding_pieces = board.bishops | board.rooks | board.queens
+        rescanned = (changed & board.occupied) | newly_slotted
+        for square in chess.scan_forward(sliding_pieces & ~changed):
+            if self._attacks[square] & changed:
+                rescanned |= chess.BB_SQUARES[square]
+        for square in chess.scan_forward(rescanned):
+            color = board.color_at(square)
+            attacks_before = self._attacks.get(square, 0)
+            attacks_after = board.attacks_mask(square)
+            self._attacks[square] = attacks_after
+            dirty[color] |= attacks_before | attacks_after
+            slot = self._slot_of_square.get(square)
+            if slot is not None and slot in _MOBILITY_STARTS:
+                start = _MOBILITY_STARTS[slot]
+                scopes = extract_features._sliding_piece_scope(
+                    board, _SLOT_PIECES[slot], square
+                )
+                features[start : start + len(scopes)] = scopes
+
+        # Recompute the lowest-valued attacker of the squares whose
+        # attackers may have changed and, with it, the piece-list
+        # entries of the pieces that read them.
+        refreshed = moved_to | newly_slotted
+        for color in chess.COLORS:
+            map_start = _ATTACK_MAPS_START[color]
+            for square in chess.scan_forward(dirty[color]):
+                attackers = board.attackers_mask(color, square)
+                min_attacker = 0
+                if attackers:
+                    for piece_type in chess.PIECE_TYPES:
+                        if attackers & board.pieces_mask(piece_type, color):
+                            min_attacker = piece_type
+                            break
+                # `extract_features` indexes the attack maps by the
+                # vertically mirrored square; see
+                # `__init_attackers_and_scope_bitboard()`.
+                index = chess.square_mirror(square)
+                if features[map_start + index] != min_attacker:
+                    features[map_start + index] = min_attacker
+                    refreshed |= chess.BB_SQUARES[index]
+
+        for square in chess.scan_forward(refreshed):
+            slot = self._slot_of_square.get(square)
+            if slot is not None:
+                self._set_slot(slot, square)
+
+    def pop(self):
+        '''
+        Unmakes the last move on `board` and restores `features`.
+
+        Returns:
+            `chess.Move`
+                The move that was unmade.
+        '''
+        (
+            self.features,
+            self._slot_of_square,
+            self._free_slots,
+            self._unslotted,
+            self._attacks
+        ) = self._stack.pop()
+        return self.board.pop()
+
+    def _set_slot(self, slot, square):
+        '''
+        Sets the piece-list entry of `slot` to its piece on `square`.
+        '''
+        start = _PIECE_LISTS_START + 5 * slot
+        # As in `extract_features._piece_lists()`, the lowest-valued
+        # attacker then defender of the piece.
+        attacker_and_defender = [
+            self.features[_ATTACK_MAPS_START[chess.BLACK] + square],
+            self.features[_ATTACK_MAPS_START[chess.WHITE] + square]
+        ]
+        if _SLOT_PIECES[slot] not in chess.WHITE_PIECES:
+            attacker_and_defender.reverse()
+        self.features[start : start + 5] = (
+            [8 - square // 8 - 1, square % 8, True]
+            + attacker_and_defender
+        )
+
+    def _free_slot(self, slot):
+        '''
+        Empties `slot` and its sliding-piece mobilities, if any.
+        '''
+        piece = _SLOT_PIECES[slot]
+        self._free_slots[piece] = tuple(
+            sorted(self._free_slots[piece] + (slot, ))
+        )
+        start = _PIECE_LISTS_START + 5 * slot
+        self.features[start : start + 5] = [-1, -1, False, -1, -1]
+        if slot in _MOBILITY_STARTS:
+            start = _MOBILITY_STARTS[slot]
+            n_directions = len(chess.PIECE_MOVEMENTS[piece])
+            self.features[start : start + n_directions] = (
+                [-1] * n_directions
+            )
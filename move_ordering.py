@@ -0,0 +1,135 @@
+'''
+Orders the moves of the engine's search so that the best move tends to
+be searched first, which is what makes alpha-beta prune.
+
+The moves are scored without being made, in four tiers:
+  1. The best move found by an earlier search, from the transposition
+     table.
+  2. Captures and promotions, most valuable victim first and, among
+     those, least valuable attacker first (MVV-LVA), by the
+     `extract_features.RELATIVE_VALS` of the pieces.
+  3. Killer moves: the quiet moves that last caused a cutoff at the
+     same ply.
+  4. The other quiet moves, by how often and how deep they've caused
+     cutoffs anywhere in the search (the history heuristic).
+
+Usage:
+    orderer = move_ordering.MoveOrderer()
+    for i, move in enumerate(orderer.order(position, moves, table_move)):
+        ...
+        if beta <= alpha:
+            orderer.record_cutoff(position, move, depth)
+            break
+'''
+
+import chess
+import extract_features
+
+# The number of killer moves kept per ply.
+N_KILLERS = 2
+
+# The tiers of moves, best first.
+TABLE_MOVE, CAPTURE, KILLER, QUIET = 3, 2, 1, 0
+
+def piece_val(piece_type):
+    '''
+    The relative value of a piece of type `piece_type`.
+    '''
+    return extract_features.RELATIVE_VALS[chess.piece_symbol(piece_type)]
+
+
+def mvv_lva(position, move):
+    '''
+    The MVV-LVA score of a capture or promotion `move`: ten times the
+    value of the victim (and of the piece promoted to), less the value
+    of the attacker.
+    '''
+    victim = position.piece_type_at(move.to_square)
+    if victim is None and position.is_en_passant(move):
+        victim = chess.PAWN
+    gain = (
+        (piece_val(victim) if victim is not None else 0)
+        + (piece_val(move.promotion) if move.promotion else 0)
+    )
+    return 10 * gain - piece_val(position.piece_type_at(move.from_square))
+
+
+def first_move_cutoff_rate(stats):
+    '''
+    The fraction of a search's cutoffs caused by the first move
+    searched, from the `'cutoffs'` and `'first_move_cutoffs'` of its
+    stats. The closer to 1, the better the ordering.
+    '''
+    if not stats['cutoffs']:
+        return 0.0
+    return stats['first_move_cutoffs'] / stats['cutoffs']
+
+
+class MoveOrderer:
+    '''
+    The killer moves and history table of a search, kept from one
+    search to the next of an iterative deepening.
+
+    Members:
+        `killers` : dict
+            The last `N_KILLERS` quiet moves to cause a cutoff at each
+            ply, most recent first, keyed by the ply of the game.
+        `history` : 3-d list of ints
+            The sum of the squared depths of the cutoffs caused by each
+            quiet move, indexed by color, from square and to square.
+    '''
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.killers = {}
+        self.history = [
+            [[0] * 64 for from_square in chess.SQUARES]
+            for color in chess.COLORS
+        ]
+
+    def _is_quiet(self, position, move):
+        return not (position.is_capture(move) or move.promotion)
+
+    def score(self, position, move, table_move=None, killers=()):
+        '''
+        The score of `move` to sort by; higher is searched first.
+        '''
+        if move == table_move:
+            return TABLE_MOVE, 0
+        if not self._is_quiet(position, move):
+            return CAPTURE, mvv_lva(position, move)
+        if move in killers:
+            return KILLER, -killers.index(move)
+        return (
+            QUIET,
+            self.history[position.turn][move.from_square][move.to_square]
+        )
+
+    def order(self, position, moves, table_move=None):
+        '''
+        `moves`, legal moves of `position`, best first.
+        '''
+        killers = self.killers.get(len(position.move_stack), [])
+        return sorted(
+            moves,
+            key=lambda move : self.score(position, move, table_move, killers),
+            reverse=True
+        )
+
+    def record_cutoff(self, position, move, depth):
+        '''
+        Notes that `move` caused a cutoff in `position`, searched to
+        `depth`. Only quiet moves are noted; captures are already
+        ordered first.
+        '''
+        if not self._is_quiet(position, move):
+            return
+        killers = self.killers.setdefault(len(position.move_stack), [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[N_KILLERS : ]
+        self.history[position.turn][move.from_square][move.to_square] += (
+            depth * depth
+        )
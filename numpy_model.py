@@ -0,0 +1,227 @@
+'''
+Runs the trained model with nothing but numpy.
+
+The model is a small network -- a `Merge` of one `Dense` layer per
+modality of features, followed by a few `Dense` and `Activation`
+layers -- so its forward pass is only a handful of matrix products.
+`export_model()` dumps the weights, the layout of the branches and the
+activations of a Keras model to an .npz file, and `load_model()` loads
+them back as a `NumpyModel` without importing Keras.
+
+The scaling of the features is folded into the weights of the first
+layer of each branch, and the unscaling of the evaluations applied to
+the output, so a `NumpyModel` takes features as `get_features()`
+returns them and gives evaluations as `engine_evaluate()` does.
+
+Usage:
+    # At training time, or once from the saved model; see `__main__`.
+    numpy_model.export_model(
+        model, fitted_scalers, numpy_model.NUMPY_MODEL_PATH
+    )
+
+    # In the engine.
+    model = numpy_model.load_model(numpy_model.NUMPY_MODEL_PATH)
+    evaluations = model.evaluate(features_batch)
+'''
+
+import json
+import numpy as np
+
+NUMPY_MODEL_PATH = '/Users/colinni/evAl-chess/numpy_model.npz'
+
+ACTIVATIONS = {
+    'linear' : lambda x : x,
+    'relu' : lambda x : np.maximum(x, 0),
+    'tanh' : np.tanh,
+    'sigmoid' : lambda x : 1 / (1 + np.exp(-x))
+}
+
+def _export_layers(layers, prefix, weights):
+    '''
+    The layout of a stack of Keras layers, as a list of dicts, adding
+    the weights of its `Dense` layers to `weights` under `prefix`.
+    `Dropout` layers do nothing at inference and are left out.
+    '''
+    layout = []
+    for layer in layers:
+        layer_type = type(layer).__name__
+        if layer_type == 'Dropout':
+            continue
+        if layer_type not in ('Dense', 'Activation'):
+            raise ValueError('Can\'t export a ' + layer_type + ' layer.')
+        activation = layer.get_config()['activation']
+        if activation not in ACTIVATIONS:
+            raise ValueError('Can\'t export activation ' + repr(activation))
+        if layer_type == 'Dense':
+            name = prefix + str(len(layout))
+            weights[name + '_W'], weights[name + '_b'] = layer.get_weights()
+        layout.append({'type' : layer_type, 'activation' : activation})
+    return layout
+
+
+def export_model(model, fitted_scalers, path, n_check=256):
+    '''
+    Saves `model` -- a `Sequential` whose first layer is a `Merge` of
+    `Sequential` branches -- with the scaling of `fitted_scalers`
+    (a `scalers.Scalers`) folded in, then checks that the saved model
+    gives the same outputs as `model.predict()`.
+
+    Parameters:
+        `n_check` : int
+            The number of random positions' worth of features to check
+            the saved model on.
+    '''
+    merge, *trunk = model.layers
+    if type(merge).__name__ != 'Merge':
+        raise ValueError('The first layer of the model isn\'t a `Merge`.')
+    if merge.mode not in ('concat', 'sum'):
+        raise ValueError('Can\'t export merge mode ' + repr(merge.mode))
+    weights = {}
+    branches = [
+        _export_layers(branch.layers, 'branch' + str(i) + '_', weights)
+        for i, branch in enumerate(merge.layers)
+    ]
+    layout = {
+        'branches' : branches,
+        'merge_mode' : merge.mode,
+        'trunk' : _export_layers(trunk, 'trunk_', weights)
+    }
+    # Fold the scaling, `(x - mean_X) / scale_X`, into each branch's
+    # first layer: `x_scaled @ W + b` is `x @ (W / scale_X) + b'`.
+    start, split_points = 0, []
+    for i, branch in enumerate(branches):
+        if not branch or branch[0]['type'] != 'Dense':
+            raise ValueError(
+                'The first layer of branch ' + str(i) + ' isn\'t `Dense`.'
+            )
+        name = 'branch' + str(i) + '_0'
+        W, b = weights[name + '_W'], weights[name + '_b']
+        mean_X = fitted_scalers.mean_X[start : start + len(W)]
+        scale_X = fitted_scalers.scale_X[start : start + len(W)]
+        weights[name + '_W'] = W / scale_X[:, np.newaxis]
+        weights[name + '_b'] = b - (mean_X / scale_X) @ W
+        split_points.append(start)
+        start += len(W)
+    if start != len(fitted_scalers.mean_X):
+        raise ValueError(
+            'The branches take ' + str(start) + ' features but the '
+            'scaling is of ' + str(len(fitted_scalers.mean_X)) + '.'
+        )
+
+    np.savez(
+        path,
+        layout=json.dumps(layout),
+        mean_Y=fitted_scalers.mean_Y,
+        scale_Y=fitted_scalers.scale_Y,
+        **weights
+    )
+
+    # Check the saved model against Keras on features drawn around the
+    # means of the training data.
+    X = np.round(
+        fitted_scalers.mean_X
+        + fitted_scalers.scale_X * np.random.randn(n_check, start)
+    )
+    expected = fitted_scalers.inverse_transform_Y(
+        model.predict(
+            np.split(fitted_scalers.transform_X(X), split_points[1 : ], axis=1),
+            batch_size=n_check
+        )
+    )[:, 0]
+    if not np.allclose(
+        load_model(path).evaluate(X), expected, rtol=1e-4, atol=1e-4
+    ):
+        raise ValueError('The exported model\'s outputs differ from Keras\'s.')
+
+
+class NumpyModel:
+    '''
+    A model exported by `export_model()`.
+    '''
+
+    def __init__(self, layout, weights, mean_Y, scale_Y):
+        self.merge_mode = layout['merge_mode']
+        self.branches = [
+            self._load_layers(branch, 'branch' + str(i) + '_', weights)
+            for i, branch in enumerate(layout['branches'])
+        ]
+        self.trunk = self._load_layers(layout['trunk'], 'trunk_', weights)
+        # Where to split the features among the branches.
+        self.split_points = np.cumsum(
+            [len(branch[0][1]) for branch in self.branches]
+        )[ : -1]
+        self.mean_Y, self.scale_Y = mean_Y, scale_Y
+
+    @staticmethod
+    def _load_layers(layout, prefix, weights):
+        '''
+        The layers of `layout` as a list of `(activation, W, b)`,
+        where `W` and `b` are `None` for `Activation` layers.
+        '''
+        return [
+            (
+                ACTIVATIONS[layer['activation']],
+                weights.get(prefix + str(i) + '_W'),
+                weights.get(prefix + str(i) + '_b')
+            )
+            for i, layer in enumerate(layout)
+        ]
+
+    @staticmethod
+    def _forward(layers, x):
+        for activation, W, b in layers:
+            if W is not None:
+                x = x @ W + b
+            x = activation(x)
+        return x
+
+    def evaluate(self, features_batch):
+        '''
+        The model's evaluations of the rows of unscaled features
+        `features_batch`, unscaled as by
+        `scalers.Scalers.inverse_transform_Y()`.
+
+        Returns:
+            numpy array of floats
+                The evaluation of each row of `features_batch`.
+        '''
+        X = np.asarray(features_batch, dtype=float)
+        branch_outputs = [
+            self._forward(branch, x)
+            for branch, x in zip(
+                self.branches, np.split(X, self.split_points, axis=1)
+            )
+        ]
+        if self.merge_mode == 'concat':
+            merged = np.concatenate(branch_outputs, axis=1)
+        else:
+            merged = sum(branch_outputs)
+        y_scaled = self._forward(self.trunk, merged)
+        return (y_scaled * self.scale_Y + self.mean_Y)[:, 0]
+
+
+def load_model(path):
+    '''
+    Loads the model saved by `export_model()`.
+    '''
+    with np.load(path) as saved_model:
+        weights = dict(saved_model)
+    return NumpyModel(
+        json.loads(str(weights.pop('layout'))),
+        weights,
+        weights.pop('mean_Y'),
+        weights.pop('scale_Y')
+    )
+
+
+if __name__ == '__main__':
+    # Export the model last saved by `train_model.py`.
+    import keras.models
+    import scalers
+    export_model(
+        keras.models.load_model(
+            '/Users/colinni/evAl-chess/saved_keras_model.h5'
+        ),
+        scalers.load_scalers(scalers.SCALERS_PATH),
+        NUMPY_MODEL_PATH
+    )
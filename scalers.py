@@ -0,0 +1,90 @@
+'''
+Saves the scaling fitted to the training data -- the means and scales
+of the features and evaluations and the transform applied to the
+evaluations beforehand -- as a small .npz file, and loads it back with
+nothing but numpy.
+
+The engine needs the scaling to evaluate a position but not the data
+it was fitted to; loading it from this file keeps the engine's startup
+independent of the size of the dataset.
+
+Usage:
+    # At training time.
+    scalers.save_scalers(scalers.SCALERS_PATH, scaler_X, scaler_Y)
+
+    # In the engine.
+    fitted_scalers = scalers.load_scalers(scalers.SCALERS_PATH)
+    x_scaled = fitted_scalers.transform_X(x_unscaled)
+'''
+
+import numpy as np
+
+SCALERS_PATH = '/Users/colinni/evAl-chess/scalers.npz'
+
+# The transform applied to the evaluations before they're scaled; see
+# `training_data.transform_Y()`.
+SIGNED_SQRT = 'signed_sqrt'
+
+def save_scalers(path, scaler_X, scaler_Y, Y_transform=SIGNED_SQRT):
+    '''
+    Saves the means and scales of two fitted
+    `sklearn.preprocessing.StandardScaler`s, one of the features and
+    one of the evaluations, along with the name of the transform
+    applied to the evaluations before scaling.
+    '''
+    np.savez(
+        path,
+        mean_X=scaler_X.mean_,
+        scale_X=scaler_X.scale_,
+        mean_Y=scaler_Y.mean_,
+        scale_Y=scaler_Y.scale_,
+        Y_transform=Y_transform
+    )
+
+
+class Scalers:
+    '''
+    The fitted scaling, applied the same way as the
+    `StandardScaler`s it was saved from.
+    '''
+
+    def __init__(self, mean_X, scale_X, mean_Y, scale_Y, Y_transform):
+        self.mean_X, self.scale_X = mean_X, scale_X
+        self.mean_Y, self.scale_Y = mean_Y, scale_Y
+        self.Y_transform = Y_transform
+
+    def transform_X(self, X):
+        '''
+        Scales rows of features, as `scaler_X.transform()`.
+        '''
+        return (X - self.mean_X) / self.scale_X
+
+    def inverse_transform_Y(self, Y):
+        '''
+        Unscales the model's outputs, as `scaler_Y.inverse_transform()`.
+        The result is still transformed; see `untransform_Y()`.
+        '''
+        return Y * self.scale_Y + self.mean_Y
+
+    def untransform_Y(self, Y):
+        '''
+        Undoes the transform applied to the evaluations before scaling,
+        giving evaluations in pawns.
+        '''
+        if self.Y_transform == SIGNED_SQRT:
+            return np.square(Y) * np.sign(Y)
+        raise ValueError('Unknown transform: ' + repr(self.Y_transform))
+
+
+def load_scalers(path):
+    '''
+    Loads the scaling saved by `save_scalers()`.
+    '''
+    with np.load(path) as saved_scalers:
+        return Scalers(
+            saved_scalers['mean_X'],
+            saved_scalers['scale_X'],
+            saved_scalers['mean_Y'],
+            saved_scalers['scale_Y'],
+            str(saved_scalers['Y_transform'])
+        )
@@ -0,0 +1,100 @@
+'''
+Keeps Stockfish's static evaluations on disk, in an sqlite database,
+so that each position is only ever asked of the engine once.
+
+The evaluations are keyed by the Zobrist hash of the position
+(`chess.polyglot.zobrist_hash()`) and by the identity of the engine --
+a hash of its executable -- so that rebuilding the engine, or pointing
+at another one, never gives evaluations made by the last.
+
+Usage:
+    with static_eval_cache.StaticEvalCache(
+        static_eval_cache.CACHE_PATH,
+        static_eval_cache.engine_identity(benchmark_SF_eval.stockfish_path())
+    ) as cache:
+        _eval = cache.get(key)
+        if _eval is None:
+            ...
+        cache.put_many([(key, _eval), ...])
+'''
+
+import hashlib
+import sqlite3
+
+CACHE_PATH = '/Users/colinni/evAl-chess/static_evals.sqlite'
+
+def engine_identity(engine_path):
+    '''
+    A hash of the engine's executable.
+    '''
+    sha1 = hashlib.sha1()
+    with open(engine_path, 'rb') as file_engine:
+        for block in iter(lambda : file_engine.read(2 ** 20), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def _signed(key):
+    '''
+    The unsigned 64-bit `key` as sqlite's signed 64-bit integers.
+    '''
+    return key - 2 ** 64 if key >= 2 ** 63 else key
+
+
+class StaticEvalCache:
+    '''
+    The static evaluations of one engine, `engine_id`, in the database
+    at `path`.
+
+    Members:
+        `hits`, `misses` : int, int
+            The number of lookups that found an evaluation and that
+            didn't.
+    '''
+
+    def __init__(self, path, engine_id):
+        self.engine_id = engine_id
+        self.hits = self.misses = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS static_evals ('
+            'engine TEXT, key INTEGER, eval INTEGER, '
+            'PRIMARY KEY (engine, key))'
+        )
+
+    def get(self, key):
+        '''
+        The evaluation of the position with Zobrist hash `key`, or
+        `None` if it isn't cached.
+        '''
+        row = self._connection.execute(
+            'SELECT eval FROM static_evals WHERE engine = ? AND key = ?',
+            (self.engine_id, _signed(key))
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put_many(self, items):
+        '''
+        Caches the `(key, evaluation)` pairs of `items` and commits them.
+        '''
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO static_evals VALUES (?, ?, ?)',
+                (
+                    (self.engine_id, _signed(key), _eval)
+                    for key, _eval in items
+                )
+            )
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
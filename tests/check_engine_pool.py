@@ -0,0 +1,51 @@
+'''
+Checks that `benchmark_SF_eval.EnginePool.static_eval_batch()` gives
+each position the same evaluation as `_stockfish_static_eval()`, with
+`fake_stockfish.py` standing in for Stockfish and the positions of
+`benchmark_positions.fen`. The pool is run with several numbers of
+engines and positions in flight -- some too few for the positions to
+fit in one round -- and with the engines answering after random delays.
+
+    python tests/check_engine_pool.py
+'''
+
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+os.environ['STOCKFISH_PATH'] = os.path.join(TESTS_DIR, 'fake_stockfish.py')
+os.environ['FAKE_STOCKFISH_DELAY'] = '0.001'
+sys.path.insert(0, REPO_DIR)
+
+import chess
+import benchmark_SF_eval
+
+def read_positions():
+    with open(os.path.join(REPO_DIR, 'benchmark_positions.fen')) as file_fens:
+        return [
+            chess.Board(line.strip()) for line in file_fens if line.strip()
+        ]
+
+
+if __name__ == '__main__':
+    positions = read_positions()
+    expected = [
+        benchmark_SF_eval._stockfish_static_eval(position)
+        for position in positions
+    ]
+    for n_engines, max_in_flight in ((1, 256), (3, 7), (4, 64)):
+        with benchmark_SF_eval.EnginePool(
+            n_engines, max_in_flight=max_in_flight
+        ) as pool:
+            evals = pool.static_eval_batch(positions)
+        if evals != expected:
+            sys.exit(
+                'Mismatch with ' + str(n_engines) + ' engines and '
+                + str(max_in_flight) + ' in flight.'
+            )
+        print(
+            n_engines, 'engines,', max_in_flight, 'in flight:',
+            len(positions), 'positions match'
+        )
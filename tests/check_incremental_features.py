@@ -0,0 +1,116 @@
+'''
+Checks that `incremental_features.FeatureAccumulator` keeps the same
+features as `extract_features.get_features()` as moves are pushed and
+popped, up to the order of the pieces within each kind's slots --
+including from positions with more pieces of a kind than slots, whose
+extra pieces take the slots that free up. Which pieces are extra is
+random, so each line is played `N_REPEATS` times.
+
+    python tests/check_incremental_features.py
+'''
+
+import collections
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess
+import extract_features
+import incremental_features
+
+# Lines of play from each root, as UCI moves.
+LINES = (
+    (
+        chess.STARTING_FEN,
+        ('e2e4', 'd7d5', 'e4d5', 'd8d5', 'b1c3', 'd5a5', 'e1e2')
+    ),
+    # Over capacity at the root: three white queens.
+    (
+        '4k3/8/8/8/8/8/8/QQQ1K3 w - - 0 1',
+        ('a1a8', 'e8d7', 'b1b7', 'd7d6', 'a8d8', 'd6e5')
+    ),
+    # Over capacity at the root, and then a queen is captured.
+    (
+        '2r1k3/8/8/8/8/8/8/QQQ1K3 b - - 0 1',
+        ('c8c1', 'b1c1', 'e8e7', 'c1c7', 'e7e6')
+    ),
+    # A third rook by underpromotion, and then a rook is captured.
+    (
+        '4k3/P7/8/8/8/8/1r6/R3K2R w - - 0 1',
+        ('a7a8r', 'b2h2', 'a1b1', 'h2h1', 'e1e2', 'h1a1', 'b1a1')
+    )
+)
+
+N_REPEATS = 20
+
+def _slot_groups(features):
+    '''
+    The piece-list entries and mobilities of each kind of piece, sorted,
+    so that features differing only in the order of the slots compare
+    equal.
+    '''
+    groups = collections.defaultdict(list)
+    mobility_start = incremental_features._MOBILITY_START
+    for slot, piece in enumerate(incremental_features._SLOT_PIECES):
+        start = incremental_features._PIECE_LISTS_START + 5 * slot
+        entry = tuple(features[start : start + 5])
+        if piece in chess.SLIDING_PIECES:
+            n_directions = len(chess.PIECE_MOVEMENTS[piece])
+            entry += tuple(
+                features[mobility_start : mobility_start + n_directions]
+            )
+            mobility_start += n_directions
+        groups[piece].append(entry)
+    return {piece : sorted(entries) for piece, entries in groups.items()}
+
+
+def check(accumulator):
+    features = accumulator.features
+    if len(features) != extract_features.N_FEATURES:
+        sys.exit(
+            accumulator.board.fen() + ': ' + str(len(features))
+            + ' features.'
+        )
+    # With extra pieces, `get_features()` leaves out random ones; only
+    # compare the features that don't depend on which.
+    expected = extract_features.get_features(
+        accumulator.board.copy(stack=False), backend='bitboard'
+    )
+    over_capacity = any(
+        count > chess.PIECE_CAPACITY[piece]
+        for piece, count in zip(
+            chess.PIECES,
+            features[
+                incremental_features._MATERIAL_START
+                : incremental_features._PIECE_LISTS_START
+            ]
+        )
+    )
+    pieces_start = incremental_features._PIECE_LISTS_START
+    attack_maps_start = extract_features.FEATURE_MODALITY_SPLIT_POINTS[2]
+    if (
+        features[ : pieces_start] != expected[ : pieces_start]
+        or features[attack_maps_start : ] != expected[attack_maps_start : ]
+        or (
+            not over_capacity
+            and _slot_groups(features) != _slot_groups(expected)
+        )
+    ):
+        sys.exit(accumulator.board.fen() + ': features differ.')
+
+
+if __name__ == '__main__':
+    for fen, line in LINES:
+        for _ in range(N_REPEATS):
+            accumulator = incremental_features.FeatureAccumulator(
+                chess.Board(fen)
+            )
+            check(accumulator)
+            for uci in line:
+                accumulator.push(chess.Move.from_uci(uci))
+                check(accumulator)
+            for _ in line:
+                accumulator.pop()
+                check(accumulator)
+        print(fen, ':', len(line), 'moves match')
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+'''
+Stands in for the modified Stockfish in `evAl-chess`, speaking the same
+protocol: it prints a banner when started, then answers each `eval`
+with the static evaluation of the last `position fen` -- a number on
+one line followed by an empty line -- until `quit`.
+
+The evaluation is the material balance in centipawns plus a few
+centipawns derived from the position's Zobrist hash, so that giving an
+evaluation to the wrong position is all but certain to show. If
+`$FAKE_STOCKFISH_DELAY` is set, each evaluation first sleeps a random
+time of up to that many seconds, so that engines evaluating together
+finish in different orders.
+'''
+
+import os
+import random
+import sys
+import time
+import chess
+import chess.polyglot
+
+PIECE_VALS = {
+    chess.PAWN : 100, chess.KNIGHT : 300, chess.BISHOP : 300,
+    chess.ROOK : 500, chess.QUEEN : 900, chess.KING : 0
+}
+
+def static_eval(position):
+    material = sum(
+        PIECE_VALS[piece.piece_type] * (1 if piece.color else -1)
+        for piece in position.piece_map().values()
+    )
+    return material + chess.polyglot.zobrist_hash(position) % 97
+
+
+if __name__ == '__main__':
+    max_delay = float(os.environ.get('FAKE_STOCKFISH_DELAY', 0))
+    print('Fake Stockfish for evAl-chess', flush=True)
+    position = chess.Board()
+    for line in sys.stdin:
+        line = line.strip()
+        if line.startswith('position fen '):
+            position = chess.Board(line[len('position fen ') : ])
+        elif line == 'eval':
+            if max_delay:
+                time.sleep(random.uniform(0, max_delay))
+            print(static_eval(position))
+            print(flush=True)
+        elif line == 'quit':
+            break
@@ -7,40 +7,38 @@ experimentation.
 '''
 
 import numpy as np
-import extract_features
+import training_data
+import scalers
+import numpy_model
 import itertools
 import math
 
-from sklearn import cross_validation, preprocessing
 from keras.models import Sequential, load_model
 from keras.layers.core import Dense, Activation, Dropout, Merge
 from keras.optimizers import SGD
 
 np.random.seed(1337)
 
-X = np.load('/Users/colinni/evAl-chess/X.npy')
-Y = np.load('/Users/colinni/evAl-chess/Y.npy')
+# Memory-mapped; rows are only read a chunk or mini-batch at a time.
+# (See `training_data.py`.)
+X, Y = training_data.open_data(
+    '/Users/colinni/evAl-chess/X.npy',
+    '/Users/colinni/evAl-chess/Y.npy'
+)
 
 print('X, Y shape.')
 print(X.shape)
 print(Y.shape)
 
 
-Y = np.sqrt(np.abs(Y)) * (2 * (Y > 0) - 1)
-
-permuted = np.random.permutation(len(Y))
-X, Y = X[permuted], Y[permuted]
-
-
-X_train, X_test, Y_train, Y_test = cross_validation.train_test_split(
-    X, Y,
+# The splits are kept as indices into `X` and `Y` rather than copies.
+train_indices, test_indices = training_data.split_indices(
+    len(Y),
     test_size=0.3
 )
 
-scaler_X, scaler_Y = preprocessing.StandardScaler(), preprocessing.StandardScaler()
 # Scale based only on training data.
-scaler_X.fit(X_train)
-scaler_Y.fit(np.reshape(Y_train, (len(Y_train), 1)))
+scaler_X, scaler_Y = training_data.fit_scalers(X, Y, train_indices)
 
 
 if __name__ == '__main__':
@@ -49,65 +47,68 @@ if __name__ == '__main__':
     def material_count(config):
         return 1 * config[0] + 3 * config[1] + 3 * config[2] + 5 * config[3] + 9 * config[4]
 
-    def get_material_imbalanced_positions(X, Y, material_diff):
-        material_diffs = np.array([abs(material_count(sample[5:11]) - material_count(sample[11:17])) for sample in X])
-        material_diff_positions = np.where(material_diffs >= material_diff)
-        return X[material_diff_positions, :][0], Y[material_diff_positions]
-
-    def get_range_positions(X, Y, lower, upper):
-        X = X[np.where(lower <= np.abs(Y))]
-        Y = Y[np.where(lower <= np.abs(Y))]
-        X = X[np.where(np.abs(Y) <= upper)]
-        Y = Y[np.where(np.abs(Y) <= upper)]
-        return X, Y
-
-    def __split_and_transform(X, Y):
-        X, Y = scaler_X.transform(X), scaler_Y.transform(np.reshape(Y, (len(Y), 1)))
-        X = extract_features.split_features(X)
-        return X, Y
-
-    def get_openings(X, Y):
-        opening_positions = np.where(X[:, 5] >= 7)
-        return X[opening_positions, :][0], Y[opening_positions]
-
-    def __evaluate_model(test_data):
-        X_test, Y_test = test_data
-        _eval = model.evaluate(*__split_and_transform(X_test, Y_test), verbose=0)
+    def get_material_imbalanced_positions(indices, material_diff):
+        return training_data.select(
+            X, Y, indices,
+            lambda X_chunk, Y_chunk :
+                np.abs(
+                    material_count(X_chunk[:, 5:11].T)
+                    - material_count(X_chunk[:, 11:17].T)
+                ) >= material_diff
+        )
+
+    def get_range_positions(indices, lower, upper):
+        return training_data.select(
+            X, Y, indices,
+            lambda X_chunk, Y_chunk :
+                (lower <= np.abs(Y_chunk)) & (np.abs(Y_chunk) <= upper)
+        )
+
+    def get_openings(indices):
+        return training_data.select(
+            X, Y, indices,
+            lambda X_chunk, Y_chunk : X_chunk[:, 5] >= 7
+        )
+
+    def __evaluate_model(indices, batch_size=1024):
+        # A selection may match no positions.
+        if len(indices) == 0:
+            return 'no positions'
+        _eval = model.evaluate_generator(
+            training_data.iter_batches(
+                X, Y, indices, batch_size, scaler_X, scaler_Y,
+                shuffle=False
+            ),
+            val_samples=len(indices)
+        )
         return _eval, math.sqrt(_eval)
 
 
-    def check_test_perf(model, X_test, Y_test):
-        print(X_test.shape, Y_test.shape)
-        print('Test score on all positions:', __evaluate_model((X_test, Y_test)))
-        print('Test score on material imabalanced positions:', __evaluate_model(get_material_imbalanced_positions(X_test, Y_test, 2.5)))
-        print('Test score on ground truth range 3-15:', __evaluate_model(get_range_positions(X_test, Y_test, 3, 15)))
-        print('Test score on ground truth range 1-3:', __evaluate_model(get_range_positions(X_test, Y_test, 1, 3)))
-        print('Test score on ground truth range 0.1-1:', __evaluate_model(get_range_positions(X_test, Y_test, 0.1, 1)))
-        print('Test score on ground truth range 0.1-15:', __evaluate_model(get_range_positions(X_test, Y_test, 0.1, 15)))
-        print('Test score on openings:', __evaluate_model(get_openings(X_test, Y_test)))
+    def check_test_perf(model, test_indices):
+        print(test_indices.shape)
+        print('Test score on all positions:', __evaluate_model(test_indices))
+        print('Test score on material imabalanced positions:', __evaluate_model(get_material_imbalanced_positions(test_indices, 2.5)))
+        print('Test score on ground truth range 3-15:', __evaluate_model(get_range_positions(test_indices, 3, 15)))
+        print('Test score on ground truth range 1-3:', __evaluate_model(get_range_positions(test_indices, 1, 3)))
+        print('Test score on ground truth range 0.1-1:', __evaluate_model(get_range_positions(test_indices, 0.1, 1)))
+        print('Test score on ground truth range 0.1-15:', __evaluate_model(get_range_positions(test_indices, 0.1, 15)))
+        print('Test score on openings:', __evaluate_model(get_openings(test_indices)))
 
-    def select_training_data(X_train, Y_train, num):
+    def select_training_data(train_indices, num):
         if num == 1: # All data.
-            X_train, Y_train = __split_and_transform(X_train, Y_train)
-            return X_train, Y_train
+            return train_indices
         elif num == 2:
-            X_train, Y_train = __split_and_transform(*get_material_imbalanced_positions(X_train, Y_train, 2.5))
-            return X_train, Y_train
+            return get_material_imbalanced_positions(train_indices, 2.5)
         elif num == 3:
-            X_train, Y_train = __split_and_transform(*get_range_positions(X_train, Y_train, 3, 15))
-            return X_train, Y_train
+            return get_range_positions(train_indices, 3, 15)
         elif num == 4:
-            X_train, Y_train = __split_and_transform(*get_range_positions(X_train, Y_train, 1, 3))
-            return X_train, Y_train
+            return get_range_positions(train_indices, 1, 3)
         elif num == 5:
-            X_train, Y_train = __split_and_transform(*get_range_positions(X_train, Y_train, 0.1, 1))
-            return X_train, Y_train
+            return get_range_positions(train_indices, 0.1, 1)
         elif num == 6:
-            X_train, Y_train = __split_and_transform(*get_range_positions(X_train, Y_train, 0.1, 15))
-            return X_train, Y_train
+            return get_range_positions(train_indices, 0.1, 15)
         elif num == 7:
-            X_train, Y_train = __split_and_transform(*get_openings(X_train, Y_train))
-            return X_train, Y_train
+            return get_openings(train_indices)
         else:
             raise ValueError
 
@@ -162,16 +163,30 @@ if __name__ == '__main__':
         if inp == 's':
             break
         if inp == 't':
-            check_test_perf(model, X_test, Y_test)
+            check_test_perf(model, test_indices)
             continue
         int(inp)
         bs = input('Batch size? ')
         num = int(input('Using what data? '))
-        history = model.fit(
-            *select_training_data(X_train, Y_train, num),
-            batch_size=int(bs),
+        # Only one mini-batch of the selected positions is read and
+        # scaled at a time.
+        indices = select_training_data(train_indices, num)
+        history = model.fit_generator(
+            training_data.iter_batches(
+                X, Y, indices, int(bs), scaler_X, scaler_Y
+            ),
+            samples_per_epoch=len(indices),
             nb_epoch=int(inp),
             verbose=1
         )
 
     model.save('/Users/colinni/evAl-chess/saved_keras_model.h5')
+    # The engine loads the scaling from here rather than refitting it
+    # to the data. (See `scalers.py`.)
+    scalers.save_scalers(scalers.SCALERS_PATH, scaler_X, scaler_Y)
+    # The engine runs the model with numpy. (See `numpy_model.py`.)
+    numpy_model.export_model(
+        model,
+        scalers.load_scalers(scalers.SCALERS_PATH),
+        numpy_model.NUMPY_MODEL_PATH
+    )
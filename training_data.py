@@ -0,0 +1,165 @@
+'''
+Serves the training data from disk rather than from memory.
+
+X.npy and Y.npy are opened memory-mapped, subsets of the data -- the
+train and test splits, the positions in some range of evaluations,
+etc. -- are kept as arrays of row indices, and only the rows of the
+chunk or mini-batch at hand are ever read and converted to floats. This
+keeps memory use small and constant no matter how large the dataset is.
+
+Usage:
+    X, Y = training_data.open_data('X.npy', 'Y.npy')
+    train_indices, test_indices = training_data.split_indices(len(Y), 0.3)
+    scaler_X, scaler_Y = training_data.fit_scalers(X, Y, train_indices)
+    model.fit_generator(
+        training_data.iter_batches(
+            X, Y, train_indices, 256, scaler_X, scaler_Y
+        ),
+        samples_per_epoch=len(train_indices),
+        nb_epoch=1
+    )
+'''
+
+import numpy as np
+import extract_features
+
+from sklearn import preprocessing
+
+# The number of rows read at a time when passing over a whole subset.
+CHUNK_SIZE = 2 ** 15
+
+def open_data(path_X, path_Y):
+    '''
+    Opens the features and evaluations memory-mapped and read-only.
+    '''
+    return np.load(path_X, mmap_mode='r'), np.load(path_Y, mmap_mode='r')
+
+
+def transform_Y(Y):
+    '''
+    The evaluations as the model is trained on them: square-rooted,
+    keeping their sign, to shrink the large evaluations of won
+    positions. (Saved as `scalers.SIGNED_SQRT` with the scaling.)
+    '''
+    return np.sqrt(np.abs(Y)) * (2 * (Y > 0) - 1)
+
+
+def split_indices(n_samples, test_size):
+    '''
+    Randomly splits the row indices `0` to `n_samples - 1` into train
+    and test indices, using numpy's global random state.
+
+    Returns:
+        2-d tuple of numpy arrays
+            The train indices and test indices.
+    '''
+    permuted = np.random.permutation(n_samples)
+    n_test = int(np.ceil(test_size * n_samples))
+    return permuted[n_test : ], permuted[ : n_test]
+
+
+def iter_chunks(X, Y, indices, chunk_size=CHUNK_SIZE):
+    '''
+    Yields the rows of `X` and transformed `Y` at `indices`, at most
+    `chunk_size` at a time, as float arrays. The rows of each chunk are
+    read in the order of the file.
+    '''
+    for start in range(0, len(indices), chunk_size):
+        chunk_indices = np.sort(indices[start : start + chunk_size])
+        yield (
+            X[chunk_indices].astype(float),
+            transform_Y(Y[chunk_indices].astype(float))
+        )
+
+
+def select(X, Y, indices, predicate, chunk_size=CHUNK_SIZE):
+    '''
+    The indices of `indices` whose rows satisfy `predicate`.
+
+    Parameters:
+        `predicate` : function
+            Takes a chunk of rows of `X` and transformed `Y`, as given
+            by `iter_chunks()`, and returns a boolean mask of the rows
+            to keep.
+    '''
+    selected = [
+        np.sort(indices[start : start + chunk_size])[
+            predicate(X_chunk, Y_chunk)
+        ]
+        for start, (X_chunk, Y_chunk) in zip(
+            range(0, len(indices), chunk_size),
+            iter_chunks(X, Y, indices, chunk_size)
+        )
+    ]
+    return np.concatenate(selected) if selected else indices[ : 0]
+
+
+def fit_scalers(X, Y, indices, chunk_size=CHUNK_SIZE):
+    '''
+    Fits a `StandardScaler` for the features and one for the
+    transformed evaluations on the rows at `indices`, a chunk at a time.
+    '''
+    scaler_X, scaler_Y = (
+        preprocessing.StandardScaler(),
+        preprocessing.StandardScaler()
+    )
+    for X_chunk, Y_chunk in iter_chunks(X, Y, indices, chunk_size):
+        scaler_X.partial_fit(X_chunk)
+        scaler_Y.partial_fit(np.reshape(Y_chunk, (len(Y_chunk), 1)))
+    return scaler_X, scaler_Y
+
+
+def scale_and_split(X_rows, Y_rows, scaler_X, scaler_Y):
+    '''
+    Scales rows of features and transformed evaluations and splits the
+    features by modality, ready to be fed to the model.
+    '''
+    return (
+        extract_features.split_features(scaler_X.transform(X_rows)),
+        scaler_Y.transform(np.reshape(Y_rows, (len(Y_rows), 1)))
+    )
+
+
+def iter_batches(
+    X, Y, indices, batch_size, scaler_X, scaler_Y, shuffle=True,
+    forever=True
+):
+    '''
+    Yields the mini-batches of the rows at `indices`, scaled and split
+    as by `scale_and_split()`, reading only one mini-batch of rows at a
+    time. Suitable for Keras's `fit_generator()` and
+    `evaluate_generator()`.
+
+    Parameters:
+        `shuffle` : bool
+            Shuffles the indices before every pass over them.
+        `forever` : bool
+            Loops over the indices endlessly, as Keras expects, rather
+            than stopping after one pass.
+    '''
+    # Checked here rather than in the generator, which would otherwise
+    # loop endlessly without yielding.
+    if len(indices) == 0:
+        raise ValueError('No rows to make mini-batches of.')
+    return _iter_batches(
+        X, Y, indices, batch_size, scaler_X, scaler_Y, shuffle, forever
+    )
+
+
+def _iter_batches(
+    X, Y, indices, batch_size, scaler_X, scaler_Y, shuffle, forever
+):
+    while True:
+        if shuffle:
+            indices = np.random.permutation(indices)
+        for start in range(0, len(indices), batch_size):
+            # The order of the rows in a mini-batch doesn't matter;
+            # sorting them reads them in the order of the file.
+            batch_indices = np.sort(indices[start : start + batch_size])
+            yield scale_and_split(
+                X[batch_indices].astype(float),
+                transform_Y(Y[batch_indices].astype(float)),
+                scaler_X, scaler_Y
+            )
+        if not forever:
+            break
@@ -0,0 +1,142 @@
+'''
+A fixed-size transposition table for the engine's search, keyed by the
+Zobrist hash of a position (`chess.polyglot.zobrist_hash()`).
+
+Each entry holds the depth a position was searched to, whether the
+score found is exact or only a bound, the score, and the best move.
+The entries are kept in preallocated numpy arrays -- one slot per
+entry, chosen by the key -- so the table's memory is fixed by its size
+in MB however many positions are searched.
+
+When two positions map to the same slot, the new entry replaces the
+old one if the old one is from an earlier search or wasn't searched
+deeper (depth-preferred replacement with aging).
+
+Usage:
+    table = transposition_table.TranspositionTable(size_mb=16)
+    table.new_search()
+    entry = table.probe(key)
+    if entry is not None:
+        depth, bound, score, move = entry
+    ...
+    table.store(key, depth, transposition_table.EXACT, score, move)
+'''
+
+import chess
+import numpy as np
+
+# The kinds of scores an entry can hold: the exact score of the
+# position, or a bound on it found by a cutoff.
+EXACT, LOWER_BOUND, UPPER_BOUND = 1, 2, 3
+
+# The bytes taken by one entry: key, score, move, depth, bound and
+# generation.
+ENTRY_SIZE = 8 + 8 + 2 + 1 + 1 + 1
+
+def encode_move(move):
+    '''
+    `move` as a 16-bit integer; `0` for `None`.
+    '''
+    if move is None:
+        return 0
+    return (
+        move.from_square
+        | move.to_square << 6
+        | (move.promotion or 0) << 12
+    )
+
+
+def decode_move(code):
+    '''
+    The move encoded by `encode_move()`.
+    '''
+    if code == 0:
+        return None
+    return chess.Move(
+        code & 63, code >> 6 & 63, (code >> 12) or None
+    )
+
+
+class TranspositionTable:
+    '''
+    Parameters:
+        `size_mb` : float
+            The memory to take for the entries, in MB.
+
+    Members:
+        `probes`, `hits` : int, int
+            The number of lookups and of lookups that found an entry.
+        `stores`, `overwrites` : int, int
+            The number of entries stored and of those that replaced an
+            entry of another position.
+    '''
+
+    def __init__(self, size_mb=16):
+        self.n_entries = max(1, int(size_mb * 2 ** 20) // ENTRY_SIZE)
+        self.keys = np.zeros(self.n_entries, dtype=np.uint64)
+        self.scores = np.zeros(self.n_entries, dtype=np.float64)
+        self.moves = np.zeros(self.n_entries, dtype=np.uint16)
+        self.depths = np.zeros(self.n_entries, dtype=np.int8)
+        # `0` marks an empty slot.
+        self.bounds = np.zeros(self.n_entries, dtype=np.uint8)
+        self.generations = np.zeros(self.n_entries, dtype=np.uint8)
+        self.generation = 0
+        self.probes = self.hits = self.stores = self.overwrites = 0
+
+    def new_search(self):
+        '''
+        Marks the entries stored so far as old, so that they're replaced
+        before the entries of the next search.
+        '''
+        self.generation = (self.generation + 1) % 256
+
+    def clear(self):
+        self.bounds[ : ] = 0
+        self.probes = self.hits = self.stores = self.overwrites = 0
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def probe(self, key):
+        '''
+        The entry of the position with Zobrist hash `key`.
+
+        Returns:
+            4-d tuple or None
+                The depth, bound, score and best move (or `None`) of the
+                entry; `None` if there's no entry of the position.
+        '''
+        self.probes += 1
+        slot = key % self.n_entries
+        if self.bounds[slot] == 0 or int(self.keys[slot]) != key:
+            return None
+        self.hits += 1
+        return (
+            int(self.depths[slot]),
+            int(self.bounds[slot]),
+            float(self.scores[slot]),
+            decode_move(int(self.moves[slot]))
+        )
+
+    def store(self, key, depth, bound, score, move):
+        '''
+        Stores the result of searching the position with Zobrist hash
+        `key` to `depth`, unless its slot holds a deeper search of
+        another position from this search.
+        '''
+        slot = key % self.n_entries
+        if self.bounds[slot] != 0 and int(self.keys[slot]) != key:
+            if (
+                self.generations[slot] == self.generation
+                and self.depths[slot] > depth
+            ):
+                return
+            self.overwrites += 1
+        self.stores += 1
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.bounds[slot] = bound
+        self.scores[slot] = score
+        self.moves[slot] = encode_move(move)
+        self.generations[slot] = self.generation